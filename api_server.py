@@ -1,22 +1,52 @@
 """
 FastAPI backend for Refugee Legal Navigator.
 RAG: amazon.titan-embed-text-v2:0 embeddings with disk cache + cosine similarity.
-Query embedding pre-warmed from cached chunk embeddings (no per-request Titan call).
+Query embeddings are served from an LRU/TTL cache, so repeated questions skip the Titan call.
 """
 import os
+import hmac
 import json
-import math
+import hashlib
 import logging
 import asyncio
+import contextvars
+import time
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
 
 import re
-from src.agents.case_tracker_agent import get_case_tracker
+from src.agents.case_tracker_agent import (
+    SOURCE_CACHE, SOURCE_FALLBACK, SOURCE_INVALID, SOURCE_PORTAL, get_case_tracker,
+)
+from src.utils.browser_pool import browser_pool_stats, shutdown_browser_pool
+from src.utils.admission import (
+    DEGRADE_KEYWORD, DEGRADE_NONE, DEGRADE_RETRIEVAL_ONLY, AdmissionController, Overloaded, Ticket,
+)
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.ann import IVFIndex, fingerprint as ann_fingerprint
+from src.utils.bm25 import BM25Index
+from src.utils.bulk_embedder import BulkEmbedder, text_digest
+from src.utils.deadline import Deadline, DeadlineExceeded
+from src.utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, FALLBACKS, REGISTRY, STAGE_SECONDS, Gauge, RequestMetricsMiddleware,
+    record_timings, server_timing, stage,
+)
+from src.utils.profiling import ProfilerBusy, run_profile
+from src.utils.quantization import candidates as quant_candidates, load_codes, quantize, save_codes
+from src.utils.sessions import Session, SessionStore, clean_history, compact
+from src.utils.embedding_index import read_index, write_index
+from src.utils.query_cache import EmbeddingCache, normalize_query
+from src.utils.singleflight import AsyncSingleFlight, SingleFlight
+from src.utils.shared_index import build_lock, publish_generation, read_generation
+from src.utils.topk import top_k_desc
+from src.utils.nova_integration import EMBEDDING_V1, bedrock_client_stats, warm_bedrock_clients
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 logging.basicConfig(level=logging.INFO)
@@ -35,113 +65,498 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 # SPA/Static routes will be defined last to avoid shadowing API endpoints.
 
-# Thread pool for blocking Titan calls
-_executor = ThreadPoolExecutor(max_workers=2)
+# Thread pool for blocking local work (index builds, scoring).
+# Bedrock calls on the request path go through AsyncNovaClient instead.
+EXECUTOR_WORKERS = int(os.environ.get("EXECUTOR_WORKERS", 4))
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS)
+
+# Upper bound on concurrent Bedrock calls from the request path
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", 64))
 
 # ── Nova client ───────────────────────────────────────────────────────────────
-_nova_client = None
+_async_nova_client = None
 
 def get_nova():
-    global _nova_client
-    if _nova_client is None:
-        from src.utils.nova_integration import NovaClient
-        _nova_client = NovaClient()
-        logger.info("NovaClient initialised")
-    return _nova_client
+    # Process-wide NovaClient; every module shares the registry's pooled Bedrock clients
+    from src.utils.nova_integration import get_nova_client
+    return get_nova_client()
+
+
+def get_bulk_nova():
+    # Index builds retry throttled calls in BulkEmbedder (backoff, checkpoint), so
+    # their Bedrock client makes one attempt per call instead of stacking retries
+    from src.utils.nova_integration import NovaClient
+    return NovaClient(max_attempts=1)
+
+
+def get_async_nova():
+    global _async_nova_client
+    if _async_nova_client is None:
+        from src.utils.nova_integration import AsyncNovaClient
+        _async_nova_client = AsyncNovaClient(max_concurrency=BEDROCK_MAX_CONCURRENCY)
+        logger.info(f"AsyncNovaClient initialised ({_async_nova_client.backend}, max {BEDROCK_MAX_CONCURRENCY} in flight)")
+    return _async_nova_client
 
 
 # ── Vector store with disk cache ─────────────────────────────────────────────
-CACHE_PATH = os.path.join(BASE_DIR, "data", "embedding_cache.json")
+# Binary mmap index (see src/utils/embedding_index.py); the JSON cache is the
+# legacy format and is migrated to INDEX_PATH the first time it is loaded.
+# DATA_DIR moves the corpus and everything generated from it (index, sidecars,
+# sessions) elsewhere, e.g. to a scratch copy for load tests.
+DATA_DIR = os.environ.get("DATA_DIR") or os.path.join(BASE_DIR, "data")
+INDEX_PATH = os.environ.get("INDEX_PATH") or os.path.join(DATA_DIR, "embedding_index.bin")
+CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.json")
+
+# Query-embedding cache; set QUERY_CACHE_PATH to persist it across restarts
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 86400))
+QUERY_CACHE_PATH = os.environ.get("QUERY_CACHE_PATH") or None
+
+# Index builds: parallel Titan calls, resumable via an append-only checkpoint
+EMBED_CONCURRENCY = int(os.environ.get("EMBED_CONCURRENCY", 8))
+CHECKPOINT_PATH = INDEX_PATH + ".ckpt"
+
+# Multi-worker sharing: one worker builds under LOCK_PATH and bumps the
+# generation file; every worker polls it and re-attaches to the new mmap.
+LOCK_PATH = INDEX_PATH + ".lock"
+GENERATION_PATH = INDEX_PATH + ".gen"
+INDEX_POLL_SECONDS = float(os.environ.get("INDEX_POLL_SECONDS", 5))
+
+# Hot reload: per-file hashes of DOCS_DIR so only changed files are re-embedded.
+# Triggered at startup, by POST /api/admin/reload, or by polling the directory
+# every DOCS_WATCH_SECONDS (0 disables the watcher).
+DOCS_DIR = os.environ.get("DOCS_DIR") or os.path.join(DATA_DIR, "legal_docs")
+SOURCES_PATH = INDEX_PATH + ".sources.json"
+DOCS_WATCH_SECONDS = float(os.environ.get("DOCS_WATCH_SECONDS", 0))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Semantic answer cache for history-free, non-case-status chat turns
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", 512))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", 3600))
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.95))
+
+# Server-side chat sessions: recent turns kept verbatim up to SESSION_MAX_TOKENS,
+# older ones folded into a summary. SESSION_DB_PATH shares them across workers
+# (SQLite); unset keeps them in-process, except under several uvicorn workers
+# (WEB_CONCURRENCY > 1), where a session id may land on any worker and they
+# default to sessions.db in DATA_DIR. At most SESSION_MAX_SESSIONS are kept.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH") or (
+    os.path.join(DATA_DIR, "sessions.db") if WEB_CONCURRENCY > 1 else None
+)
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", 10000))
+SESSION_MAX_TOKENS = int(os.environ.get("SESSION_MAX_TOKENS", 2000))
+SESSION_SUMMARY_TOKENS = int(os.environ.get("SESSION_SUMMARY_TOKENS", 400))
+SESSION_TTL = float(os.environ.get("SESSION_TTL", 86400))
+
+# Admission control for chat: concurrent requests, bounded wait queue, max wait.
+# Queue pressure above the DEGRADE_* fractions switches to keyword retrieval,
+# then to retrieval-only answers; a full queue or timeout returns 503.
+CHAT_MAX_CONCURRENT = int(os.environ.get("CHAT_MAX_CONCURRENT", 32))
+CHAT_MAX_QUEUE = int(os.environ.get("CHAT_MAX_QUEUE", 64))
+CHAT_QUEUE_TIMEOUT = float(os.environ.get("CHAT_QUEUE_TIMEOUT", 10))
+CHAT_RETRY_AFTER = int(os.environ.get("CHAT_RETRY_AFTER", 5))
+DEGRADE_KEYWORD_AT = float(os.environ.get("DEGRADE_KEYWORD_AT", 0.5))
+DEGRADE_RETRIEVAL_ONLY_AT = float(os.environ.get("DEGRADE_RETRIEVAL_ONLY_AT", 0.8))
+
+# Every chat request must finish within CHAT_DEADLINE_SECONDS of arrival. Retrieval
+# and the case-status lookup share the budget minus CHAT_GENERATION_RESERVE, which
+# is kept for Nova; a stage that runs out falls back instead of holding the request.
+CHAT_DEADLINE_SECONDS = float(os.environ.get("CHAT_DEADLINE_SECONDS", 30))
+CHAT_GENERATION_RESERVE = float(os.environ.get("CHAT_GENERATION_RESERVE", 10))
+
+# How often (seconds, jittered) the case-status refresher looks for cached
+# receipts due a re-check; 0 disables it. TTLs live in case_tracker_agent.
+CASE_REFRESH_TICK = float(os.environ.get("CASE_REFRESH_TICK", 60))
+
+# /api/track-case: per-receipt budget, receipts per batch request, and how many
+# of a batch are looked up at once (the browser pool and portal rate limit
+# bound it further)
+TRACK_CASE_TIMEOUT = float(os.environ.get("TRACK_CASE_TIMEOUT", 45))
+TRACK_BATCH_MAX = int(os.environ.get("TRACK_BATCH_MAX", 500))
+TRACK_BATCH_CONCURRENCY = int(os.environ.get("TRACK_BATCH_CONCURRENCY", 2))
+
+# SERVER_TIMING=1 adds a Server-Timing header to /api/chat responses with the
+# per-stage durations of that request (embed, search, case-track, generate, ...)
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+# Longest window POST /api/admin/profile may run for
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60))
+
+# Approximate search: "exact" (brute force), "ivf", or "auto" (IVF from ANN_MIN_CHUNKS up).
+# ANN_NPROBE trades recall for latency; ANN_NLIST=0 picks ~4*sqrt(n) cells at build time.
+ANN_MODE = os.environ.get("ANN_MODE", "auto").lower()
+ANN_MIN_CHUNKS = int(os.environ.get("ANN_MIN_CHUNKS", 50000))
+ANN_NLIST = int(os.environ.get("ANN_NLIST", 0))
+ANN_NPROBE = int(os.environ.get("ANN_NPROBE", 8))
+ANN_PATH = INDEX_PATH + ".ivf.npz"
+
+# Compressed first-pass scan: "none", "int8" or "binary". The best
+# top_k * QUANT_RERANK candidates are then re-ranked exactly in float32.
+EMBEDDING_QUANT = os.environ.get("EMBEDDING_QUANT", "none").lower()
+QUANT_RERANK = int(os.environ.get("QUANT_RERANK", 10))
+QUANT_PATH = INDEX_PATH + ".codes"
+
+# Both are built once per published generation, under build_lock, and saved
+# next to the index; workers only load the IVF cells and mmap the codes.
+
+
+def _ann_wanted(n: int) -> bool:
+    return n > 0 and (ANN_MODE == "ivf" or (ANN_MODE == "auto" and n >= ANN_MIN_CHUNKS))
+
+
+def _quant_wanted(n: int) -> bool:
+    return n > 0 and EMBEDDING_QUANT != "none"
+
+
+def publish_search_indexes(embeddings: np.ndarray) -> None:
+    """Build and save the IVF index and quantised codes enabled for `embeddings`. Call with build_lock held."""
+    n = len(embeddings)
+    if _ann_wanted(n):
+        try:
+            IVFIndex.build(embeddings, n_lists=ANN_NLIST or None, nprobe=ANN_NPROBE).save(ANN_PATH)
+        except Exception as e:
+            logger.warning(f"IVF index build failed: {e}")
+    if _quant_wanted(n):
+        try:
+            save_codes(QUANT_PATH, quantize(embeddings, EMBEDDING_QUANT), ann_fingerprint(embeddings))
+        except Exception as e:
+            logger.warning(f"Quantization disabled: {e}")
+
+
+def load_search_indexes(embeddings: np.ndarray) -> tuple:
+    """(IVF index, codes) saved for exactly `embeddings`, None for those missing, stale or disabled."""
+    n = len(embeddings)
+    if not (_ann_wanted(n) or _quant_wanted(n)):
+        return None, None
+    expected = ann_fingerprint(embeddings)
+    ann = IVFIndex.load(ANN_PATH, expected, nprobe=ANN_NPROBE) if _ann_wanted(n) else None
+    codes = load_codes(QUANT_PATH, EMBEDDING_QUANT, expected) if _quant_wanted(n) else None
+    return ann, codes
+
+
+# Identical concurrent Titan / Nova calls share one upstream request
+_embedding_flight = SingleFlight()
+_async_embedding_flight = AsyncSingleFlight()
+_generation_flight = AsyncSingleFlight()
+
+
+def _coalesced_embedding(text: str):
+    return _embedding_flight.do(normalize_query(text), get_nova().get_embeddings, text)
+
+
+def chunk_document(text: str, chunk_size: int) -> list[str]:
+    words = text.split()
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+
+
+def _read_sources() -> dict:
+    """Per-file content hashes and row ranges of the published index."""
+    try:
+        with open(SOURCES_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_sources(sources: dict) -> None:
+    tmp_path = f"{SOURCES_PATH}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sources, f, indent=1)
+    os.replace(tmp_path, SOURCES_PATH)
 
 
 class VectorStore:
+    # Minimum cosine similarity for a chunk to count as a semantic hit
+    MIN_SCORE = 0.25
+
     def __init__(self):
         self.chunks: list[str] = []
-        self.embeddings: list[list[float]] = []
+        # (n_chunks, dim) contiguous float32, rows L2-normalised at load time
+        self.embeddings: np.ndarray = np.empty((0, 0), dtype=np.float32)
         self.ready = False
+        # Published index generation this store is attached to (see shared_index)
+        self.generation = 0
+        # BM25 inverted index for the keyword fallback, rebuilt whenever chunks change
+        self.keyword_index = BM25Index([])
+        # Optional IVF index (see ANN_MODE); None means exact brute-force search
+        self.ann: IVFIndex | None = None
+        # Optional int8/binary codes (see EMBEDDING_QUANT) for the first-pass scan
+        self.codes = None
+        self.query_cache = EmbeddingCache(
+            max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL,
+            path=QUERY_CACHE_PATH, model_id=EMBEDDING_V1,
+        )
 
-    def _cosine_similarity(self, a: list[float], b: list[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(x * x for x in b))
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
+    def _embed_query(self, query_text: str) -> np.ndarray:
+        """Titan embedding for a query, served from the LRU cache when possible."""
+        return self.query_cache.get_or_compute(query_text, _coalesced_embedding)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """Return float32 rows scaled to unit length (zero rows stay zero)."""
+        mat = np.array(vectors, dtype=np.float32)  # always a fresh contiguous copy
+        norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+        np.divide(mat, norms, out=mat, where=norms > 0)
+        return mat
+
+    def _set_embeddings(self, embeddings) -> None:
+        mat = self._normalize(embeddings)
+        if mat.ndim != 2:
+            mat = mat.reshape(len(self.chunks), -1) if mat.size else np.empty((0, 0), np.float32)
+        self.embeddings = mat
+
+    @stage("search")
+    def _top_k(self, query_emb, top_k: int) -> list[tuple[float, int]]:
+        """
+        Cosine scores for the best top_k rows, highest first.
+        Exact: one matrix-vector product plus argpartition instead of a full sort.
+        With an IVF index only the rows in the nprobe closest cells are scored.
+        """
+        if self.embeddings.shape[0] == 0:
+            return []
+        query = self._normalize(query_emb)
+        if self.codes is not None:
+            # Quantised scan (within the IVF cells, if enabled), then exact re-rank
+            ids = self.ann.candidates(query) if self.ann is not None else None
+            cand = quant_candidates(self.codes, query, top_k * QUANT_RERANK, ids)
+            cand.sort()
+            scores = self.embeddings[cand] @ query
+            return [(float(scores[i]), int(cand[i])) for i in top_k_desc(scores, top_k)]
+        if self.ann is not None:
+            return self.ann.search(self.embeddings, query, top_k)
+        scores = self.embeddings @ query
+        return [(float(scores[i]), int(i)) for i in top_k_desc(scores, top_k)]
+
+    def _build_indexes(self) -> None:
+        """Rebuild BM25 and attach the IVF index and quantised codes published for the current corpus."""
+        self.keyword_index = BM25Index(self.chunks)
+        n = self.embeddings.shape[0]
+        ann, codes = load_search_indexes(self.embeddings)
+        if (_ann_wanted(n) and ann is None) or (_quant_wanted(n) and codes is None):
+            # Published before they were enabled (or by an older build): one worker builds them
+            with build_lock(LOCK_PATH):
+                ann, codes = load_search_indexes(self.embeddings)
+                if (_ann_wanted(n) and ann is None) or (_quant_wanted(n) and codes is None):
+                    publish_search_indexes(self.embeddings)
+                    ann, codes = load_search_indexes(self.embeddings)
+        self.ann, self.codes = ann, codes
+        if ann is not None:
+            logger.info(f"ANN search enabled: IVF {ann.n_lists} lists, nprobe={ann.nprobe}")
+        if codes is not None:
+            logger.info(
+                f"{EMBEDDING_QUANT} codes: {codes.nbytes / 1e6:.1f} MB, mmap'd "
+                f"(float32 matrix {self.embeddings.nbytes / 1e6:.1f} MB)"
+            )
+
+    def _attach_index(self) -> bool:
+        """Memory-map the published binary index (shared with other workers)."""
+        if not os.path.exists(INDEX_PATH):
+            return False
+        try:
+            generation = read_generation(GENERATION_PATH)
+            index = read_index(INDEX_PATH)
+            if index.model_id != EMBEDDING_V1:
+                raise ValueError(f"index built with {index.model_id}, expected {EMBEDDING_V1}")
+            # Rows are stored normalised, so the mmap'd matrix is used as-is (no copy)
+            self.chunks = index.chunks
+            self.embeddings = index.embeddings
+            self._build_indexes()
+            self.generation = generation
+            logger.info(f"Loaded {len(self.chunks)} embeddings from binary index (mmap, generation {generation})")
+            self.ready = True
+            return True
+        except Exception as e:
+            logger.warning(f"Binary index load failed: {e}")
+            return False
 
     def _load_cache(self) -> bool:
-        """Load pre-computed embeddings from disk cache."""
+        """Load pre-computed embeddings from disk cache (binary index, else legacy JSON)."""
+        if self._attach_index():
+            return True
         if not os.path.exists(CACHE_PATH):
             return False
         try:
             with open(CACHE_PATH, encoding="utf-8") as f:
                 data = json.load(f)
             self.chunks = data["chunks"]
-            self.embeddings = data["embeddings"]
-            logger.info(f"Loaded {len(self.chunks)} embeddings from disk cache")
-            self.ready = True
-            return True
+            self._set_embeddings(data["embeddings"])
+            logger.info(f"Loaded {len(self.chunks)} embeddings from legacy JSON cache")
         except Exception as e:
             logger.warning(f"Cache load failed: {e}")
             return False
+        try:
+            self._save_cache()
+            logger.info(f"Migrated {CACHE_PATH} to {INDEX_PATH}")
+        except Exception as e:
+            logger.warning(f"Binary index migration failed: {e}")
+        # After the save, so the search indexes it published are attached rather than rebuilt
+        self._build_indexes()
+        self.ready = True
+        return True
 
     def _save_cache(self):
-        """Persist embeddings to disk so next startup is instant."""
-        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
-        with open(CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump({"chunks": self.chunks, "embeddings": self.embeddings}, f)
-        logger.info(f"Saved {len(self.chunks)} embeddings to disk cache")
+        """Persist embeddings to disk so next startup is instant, and publish a new generation."""
+        with build_lock(LOCK_PATH):
+            write_index(INDEX_PATH, list(self.chunks), self.embeddings, EMBEDDING_V1)
+            # The chunk-to-file map is unknown here; the next sync rebuilds it by chunk text
+            if os.path.exists(SOURCES_PATH):
+                os.remove(SOURCES_PATH)
+            publish_search_indexes(self.embeddings)
+            self.generation = publish_generation(GENERATION_PATH)
+        logger.info(f"Saved {len(self.chunks)} embeddings to disk cache (generation {self.generation})")
 
     def load_all_documents(self, docs_dir: str, chunk_size: int = 120):
         """
         Loads all .txt documents from docs_dir, splits into chunks.
         Uses disk cache if available — otherwise calls Titan and caches result.
         """
-        # Fast path: use disk cache
-        if self._load_cache():
+        # Fast path: attach to an index another worker (or an earlier run) published
+        if self._attach_index():
             return
+        # Only one worker builds or migrates; the rest wait here, then attach
+        with build_lock(LOCK_PATH):
+            if self._load_cache():
+                return
+            summary = self._sync_locked(docs_dir, chunk_size)
+        if summary["changed"]:
+            self._attach_index()
+
+    def sync_documents(self, docs_dir: str, chunk_size: int = 120) -> dict:
+        """
+        Bring the published index in line with docs_dir, re-embedding only
+        files whose content hash changed. Returns a summary of what changed;
+        use reload_documents() to also swap the new generation in.
+        """
+        with build_lock(LOCK_PATH):
+            return self._sync_locked(docs_dir, chunk_size)
 
+    def _sync_locked(self, docs_dir: str, chunk_size: int) -> dict:
+        summary = {
+            "changed": False, "added": [], "modified": [], "removed": [],
+            "chunks_reused": 0, "chunks_embedded": 0, "chunks_failed": 0,
+        }
         if not os.path.exists(docs_dir):
             logger.warning(f"Legal docs directory not found: {docs_dir}")
-            return
+            return summary
 
         txt_files = sorted([f for f in os.listdir(docs_dir) if f.endswith(".txt")])
         if not txt_files:
             logger.warning(f"No .txt files found in {docs_dir}")
-            return
+            return summary
 
-        logger.info(f"Loading {len(txt_files)} documents from {docs_dir}")
-        all_chunks = []
+        texts, hashes = {}, {}
         for fname in txt_files:
-            path = os.path.join(docs_dir, fname)
-            with open(path, encoding="utf-8") as f:
-                text = f.read()
-            words = text.split()
-            file_chunks = [
-                " ".join(words[i:i + chunk_size])
-                for i in range(0, len(words), chunk_size)
-            ]
-            all_chunks.extend(file_chunks)
-            logger.info(f"  {fname}: {len(file_chunks)} chunks ({len(words)} words)")
-
-        logger.info(f"Computing Titan embeddings for {len(all_chunks)} total chunks (one-time operation)...")
-        nova = get_nova()
-        for i, chunk in enumerate(all_chunks):
+            with open(os.path.join(docs_dir, fname), "rb") as f:
+                raw = f.read()
+            hashes[fname] = hashlib.sha256(raw).hexdigest()
+            texts[fname] = raw.decode("utf-8")
+
+        # What the currently published index was built from
+        old, old_files = None, {}
+        if os.path.exists(INDEX_PATH):
             try:
-                emb = nova.get_embeddings(chunk)
-                self.chunks.append(chunk)
-                self.embeddings.append(emb)
-                if (i + 1) % 5 == 0 or (i + 1) == len(all_chunks):
-                    logger.info(f"  Progress: {i + 1}/{len(all_chunks)} chunks embedded")
+                old = read_index(INDEX_PATH)
+                if old.model_id != EMBEDDING_V1:
+                    old = None
             except Exception as e:
-                logger.error(f"  Chunk {i} embedding failed: {e}")
+                logger.warning(f"Binary index load failed: {e}")
+        sources = _read_sources()
+        if (old is not None and sources.get("count") == len(old)
+                and sources.get("chunk_size") == chunk_size and sources.get("model_id") == EMBEDDING_V1):
+            old_files = sources.get("files", {})
 
-        if self.chunks:
-            self._save_cache()
-            self.ready = True
-            logger.info(f"Vector store ready: {len(self.chunks)} chunks from {len(txt_files)} documents")
+        summary["added"] = [f for f in txt_files if f not in old_files]
+        summary["modified"] = [f for f in txt_files if f in old_files and old_files[f]["sha256"] != hashes[f]]
+        summary["removed"] = sorted(set(old_files) - set(txt_files))
+        if old_files and not (summary["added"] or summary["modified"] or summary["removed"]):
+            return summary
+
+        # Plan each file: unchanged files reuse their row range, changed files are
+        # re-chunked and any chunk whose exact text is already indexed reuses that row.
+        plan: dict[str, list[tuple[str, int]]] = {}
+        digest_rows = None
+        for fname in txt_files:
+            entry = old_files.get(fname)
+            if entry and entry["sha256"] == hashes[fname]:
+                rows = range(entry["start"], entry["start"] + entry["count"])
+                plan[fname] = list(zip(old.chunks[entry["start"]:entry["start"] + entry["count"]], rows))
+                continue
+            if digest_rows is None:
+                digest_rows = {text_digest(c): i for i, c in enumerate(old.chunks)} if old is not None else {}
+            file_chunks = chunk_document(texts[fname], chunk_size)
+            plan[fname] = [(c, digest_rows.get(text_digest(c), -1)) for c in file_chunks]
+            logger.info(f"  {fname}: {len(file_chunks)} chunks ({len(texts[fname].split())} words)")
+
+        all_chunks = [c for items in plan.values() for c, _ in items]
+        if not self.ready:
+            # Keyword fallback can serve the full corpus while embeddings are computed
+            self.keyword_index = BM25Index(all_chunks)
+
+        pending = [c for items in plan.values() for c, row in items if row < 0]
+        new_vectors = {}
+        embedder = None
+        if pending:
+            logger.info(f"Computing Titan embeddings for {len(pending)} of {len(all_chunks)} chunks...")
+            embedder = BulkEmbedder(
+                get_bulk_nova().get_embeddings,
+                max_workers=EMBED_CONCURRENCY,
+                checkpoint_path=CHECKPOINT_PATH,
+            )
+            new_vectors = dict(zip(pending, embedder.embed(pending)))
+
+        # Assemble the new corpus; a file with failed chunks is recorded without a
+        # hash so the next sync retries it (successful rows are reused from the checkpoint).
+        chunks, reuse_pos, reuse_rows, new_pos, new_embs, files_meta = [], [], [], [], [], {}
+        for fname, items in plan.items():
+            start, complete = len(chunks), True
+            for chunk, row in items:
+                if row >= 0:
+                    reuse_pos.append(len(chunks))
+                    reuse_rows.append(row)
+                elif new_vectors.get(chunk) is not None:
+                    new_pos.append(len(chunks))
+                    new_embs.append(new_vectors[chunk])
+                else:
+                    complete = False
+                    summary["chunks_failed"] += 1
+                    continue
+                chunks.append(chunk)
+            files_meta[fname] = {
+                "sha256": hashes[fname] if complete else "",
+                "start": start, "count": len(chunks) - start,
+            }
+        if not chunks:
+            logger.error("No chunks could be embedded; index not updated")
+            return summary
+
+        dim = old.dim if old is not None else len(new_embs[0])
+        matrix = np.empty((len(chunks), dim), dtype=np.float32)
+        if reuse_pos:
+            matrix[reuse_pos] = old.embeddings[reuse_rows]
+        if new_pos:
+            matrix[new_pos] = self._normalize(new_embs)
+
+        write_index(INDEX_PATH, chunks, matrix, EMBEDDING_V1)
+        publish_search_indexes(matrix)
+        _write_sources({"model_id": EMBEDDING_V1, "chunk_size": chunk_size, "count": len(chunks), "files": files_meta})
+        if embedder is not None and not embedder.failed:
+            embedder.checkpoint.remove()
+        summary.update(
+            changed=True,
+            chunks_reused=len(reuse_pos),
+            chunks_embedded=len(new_pos),
+            generation=publish_generation(GENERATION_PATH),
+        )
+        logger.info(
+            f"Published index generation {summary['generation']}: {len(chunks)} chunks from "
+            f"{len(txt_files)} documents ({len(reuse_pos)} reused, {len(new_pos)} embedded, "
+            f"{summary['chunks_failed']} failed)"
+        )
+        return summary
 
     def query_sync(self, query_text: str, top_k: int = 3) -> list[str]:
         """
@@ -151,51 +566,186 @@ class VectorStore:
         if not self.ready or not self.chunks:
             return self._keyword_fallback(query_text, top_k)
         try:
-            query_emb = get_nova().get_embeddings(query_text)
-            scored = [
-                (self._cosine_similarity(query_emb, chunk_emb), chunk)
-                for chunk_emb, chunk in zip(self.embeddings, self.chunks)
-            ]
-            scored.sort(key=lambda x: x[0], reverse=True)
-            results = [c for s, c in scored[:top_k] if s > 0.25]
+            query_emb = self._embed_query(query_text)
+            results = self._semantic_results(self._top_k(query_emb, top_k))
+            if results:
+                return results
+        except Exception as e:
+            logger.warning(f"Titan query embedding failed, falling back to keyword: {e}")
+        return self._keyword_fallback(query_text, top_k)
+
+    async def embed_query_async(self, query_text: str) -> np.ndarray:
+        """Async _embed_query: LRU cache, then one coalesced AsyncNovaClient call."""
+        cached = self.query_cache.get(query_text)
+        if cached is not None:
+            return cached
+        with stage("embed"):
+            embedding = await _async_embedding_flight.do(
+                normalize_query(query_text), lambda: get_async_nova().get_embeddings(query_text)
+            )
+        self.query_cache.put(query_text, embedding)
+        return np.asarray(embedding, dtype=np.float32)
+
+    async def query(self, query_text: str, top_k: int = 3) -> list[str]:
+        """
+        Async query_sync for the request path: the Titan call is awaited on the
+        event loop and only the matrix scoring runs in the thread pool.
+        """
+        if not self.ready or not self.chunks:
+            return self._keyword_fallback(query_text, top_k)
+        try:
+            query_emb = await self.embed_query_async(query_text)
+            loop = asyncio.get_event_loop()
+            # Run in a copy of this context so the search timing reaches the request's Server-Timing
+            ctx = contextvars.copy_context()
+            scored = await loop.run_in_executor(_executor, ctx.run, self._top_k, query_emb, top_k)
+            results = self._semantic_results(scored)
             if results:
-                logger.info(f"Semantic retrieval: {len(results)} chunks (top score: {scored[0][0]:.3f})")
                 return results
         except Exception as e:
             logger.warning(f"Titan query embedding failed, falling back to keyword: {e}")
         return self._keyword_fallback(query_text, top_k)
 
+    def _semantic_results(self, scored: list[tuple[float, int]]) -> list[str]:
+        results = [self.chunks[i] for s, i in scored if s > self.MIN_SCORE]
+        if results:
+            logger.info(f"Semantic retrieval: {len(results)} chunks (top score: {scored[0][0]:.3f})")
+        return results
+
     def _keyword_fallback(self, query: str, top_k: int) -> list[str]:
-        """Fast keyword overlap fallback if Titan is unavailable."""
-        if not self.chunks:
-            return []
-        query_words = set(query.lower().split())
-        scored = sorted(
-            [(len(query_words & set(c.lower().split())), c) for c in self.chunks],
-            key=lambda x: x[0], reverse=True
-        )
-        return [c for s, c in scored[:top_k] if s > 0]
+        """Fast BM25 keyword fallback if Titan is unavailable."""
+        FALLBACKS.inc(kind="keyword_retrieval")
+        index = self.keyword_index
+        return [index.chunks[i] for s, i in index.search(query, top_k) if s > 0]
 
 
 vector_store = VectorStore()
+answer_cache = SemanticAnswerCache(
+    max_size=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, threshold=ANSWER_CACHE_THRESHOLD,
+)
+sessions = SessionStore(
+    path=SESSION_DB_PATH, max_tokens=SESSION_MAX_TOKENS, summary_tokens=SESSION_SUMMARY_TOKENS, ttl=SESSION_TTL,
+    max_sessions=SESSION_MAX_SESSIONS,
+)
+chat_admission = AdmissionController(
+    max_concurrent=CHAT_MAX_CONCURRENT, max_queue=CHAT_MAX_QUEUE, queue_timeout=CHAT_QUEUE_TIMEOUT,
+    retry_after=CHAT_RETRY_AFTER, keyword_at=DEGRADE_KEYWORD_AT, retrieval_only_at=DEGRADE_RETRIEVAL_ONLY_AT,
+)
+
+# Scrape-time gauges; vector_store is read through the global so swaps are followed
+Gauge("rln_executor_queue_depth", "Tasks waiting for a thread-pool worker.", fn=lambda: _executor._work_queue.qsize())
+# Request-path Bedrock calls queue on AsyncNovaClient's slots (and its thread pool), not on _executor
+Gauge("rln_bedrock_in_flight", "Request-path Bedrock calls in flight.",
+      fn=lambda: _async_nova_client.in_flight if _async_nova_client is not None else 0)
+Gauge("rln_bedrock_waiting", "Request-path Bedrock calls waiting for a concurrency slot.",
+      fn=lambda: _async_nova_client.waiting if _async_nova_client is not None else 0)
+Gauge("rln_bedrock_pool_queue_depth", "Bedrock calls waiting for a thread (threads backend).",
+      fn=lambda: _async_nova_client.stats()["pool_queue_depth"] if _async_nova_client is not None else 0)
+Gauge("rln_index_chunks", "Chunks in the live embedding index.", fn=lambda: len(vector_store.chunks))
+Gauge("rln_index_bytes", "Size of the live embedding matrix in bytes.", fn=lambda: vector_store.embeddings.nbytes)
+Gauge("rln_index_generation", "Generation of the live embedding index.", fn=lambda: vector_store.generation)
+Gauge("rln_chat_active", "Chat requests holding an admission slot.", fn=lambda: chat_admission.active)
+Gauge("rln_chat_waiting", "Chat requests queued for admission.", fn=lambda: chat_admission.waiting)
+
+
+def refresh_vector_store() -> bool:
+    """
+    Re-attach to the shared index if another worker published a newer generation.
+    A fresh VectorStore is loaded on the side and swapped in with one assignment,
+    so in-flight requests keep using the store they started with.
+    """
+    global vector_store
+    current = vector_store
+    if not current.ready or read_generation(GENERATION_PATH) == current.generation:
+        return False
+    fresh = VectorStore()
+    fresh.query_cache = current.query_cache
+    if not fresh._attach_index():
+        return False
+    vector_store = fresh
+    logger.info(f"Attached to index generation {fresh.generation}")
+    return True
+
+
+def reload_documents(docs_dir: str = DOCS_DIR) -> dict:
+    """Re-embed changed legal docs, publish a new index generation and swap it in."""
+    summary = vector_store.sync_documents(docs_dir)
+    if summary["changed"]:
+        refresh_vector_store()
+    return summary
+
+
+def _docs_signature(docs_dir: str) -> tuple:
+    """Cheap change detector for the docs watcher (names, sizes, mtimes)."""
+    try:
+        entries = sorted(e for e in os.scandir(docs_dir) if e.name.endswith(".txt"))
+    except OSError:
+        return ()
+    return tuple((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries)
+
+
+async def index_watcher():
+    while True:
+        await asyncio.sleep(INDEX_POLL_SECONDS)
+        try:
+            await asyncio.get_event_loop().run_in_executor(_executor, refresh_vector_store)
+        except Exception as e:
+            logger.warning(f"Index refresh failed: {e}")
+
+
+async def docs_watcher(docs_dir: str):
+    signature = _docs_signature(docs_dir)
+    while True:
+        await asyncio.sleep(DOCS_WATCH_SECONDS)
+        current = _docs_signature(docs_dir)
+        if current == signature:
+            continue
+        signature = current
+        logger.info(f"Change detected in {docs_dir}; reloading legal docs")
+        try:
+            await asyncio.get_event_loop().run_in_executor(_executor, reload_documents, docs_dir)
+        except Exception as e:
+            logger.warning(f"Legal docs reload failed: {e}")
 
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("=== Refugee Legal Navigator API starting up ===")
-    docs_dir = os.path.join(BASE_DIR, "data", "legal_docs")
+    docs_dir = DOCS_DIR
     # Mark where we are running for logs
     logger.info(f"CWD: {os.getcwd()}")
     logger.info(f"BASE_DIR: {BASE_DIR}")
     
     # Run heavy document loading in background to avoid blocking App Runner health checks
     asyncio.create_task(background_startup(docs_dir))
+    if INDEX_POLL_SECONDS > 0:
+        asyncio.create_task(index_watcher())
+    if DOCS_WATCH_SECONDS > 0:
+        asyncio.create_task(docs_watcher(docs_dir))
+    if CASE_REFRESH_TICK > 0:
+        asyncio.create_task(get_case_tracker().run_refresher(CASE_REFRESH_TICK))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    try:
+        vector_store.query_cache.save()
+    except Exception as e:
+        logger.warning(f"Query cache save failed: {e}")
+    if _async_nova_client is not None:
+        await _async_nova_client.aclose()
+    await asyncio.get_event_loop().run_in_executor(None, shutdown_browser_pool)
+    sessions.close()
+
 
 async def background_startup(docs_dir: str):
     logger.info("Starting background document processing...")
     try:
         loop = asyncio.get_event_loop()
+        await loop.run_in_executor(_executor, warm_bedrock_clients)
+        await loop.run_in_executor(_executor, vector_store.query_cache.load)
         await loop.run_in_executor(_executor, vector_store.load_all_documents, docs_dir)
+        # Pick up edits to legal docs made since the index was built
+        await loop.run_in_executor(_executor, reload_documents, docs_dir)
         logger.info("Background document processing finished")
     except Exception as e:
         logger.error(f"Background document processing failed: {e}")
@@ -205,15 +755,28 @@ async def background_startup(docs_dir: str):
 class ChatRequest(BaseModel):
     message: str
     language: str = "en"
+    # Continue a server-side session; omit on the first turn and reuse the returned id
+    session_id: str | None = None
+    # Legacy: full client-side history, trimmed to the session token budget
     history: list[dict] = []  # [{"role": "user"|"assistant", "content": str}]
 
 
+class TrackCaseRequest(BaseModel):
+    receipt_number: str
+
+
+class TrackCaseBatchRequest(BaseModel):
+    receipt_numbers: list[str]
+
+
 class ChatResponse(BaseModel):
     response: str
     model: str
     context_used: bool
     num_context_chunks: int
     retrieval_method: str
+    cached: bool = False
+    session_id: str | None = None
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
@@ -224,26 +787,244 @@ def health():
         "service": "Refugee Legal Navigator API",
         "vector_store_ready": vector_store.ready,
         "chunks_indexed": len(vector_store.chunks),
-        "cache_exists": os.path.exists(CACHE_PATH),
+        "index_generation": vector_store.generation,
+        "cache_exists": os.path.exists(INDEX_PATH) or os.path.exists(CACHE_PATH),
+        "query_cache": vector_store.query_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "sessions": sessions.stats(),
+        "admission": chat_admission.stats(),
+        "browser_pool": browser_pool_stats(),
+        "bedrock": {
+            **bedrock_client_stats(),
+            "request_path": _async_nova_client.stats() if _async_nova_client is not None else None,
+        },
+        "case_tracker": get_case_tracker().stats(),
+        "coalescing": {
+            "embedding": _embedding_flight.stats(),
+            "embedding_async": _async_embedding_flight.stats(),
+            "generation": _generation_flight.stats(),
+        },
     }
 
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest):
+@app.get("/api/metrics")
+def metrics():
+    """Prometheus text exposition of stage latencies, fallbacks and gauges."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/api/admin/reload", dependencies=[Depends(require_admin)])
+async def admin_reload():
+    loop = asyncio.get_event_loop()
+    summary = await loop.run_in_executor(_executor, reload_documents, DOCS_DIR)
+    return {**summary, "index_generation": vector_store.generation, "chunks_indexed": len(vector_store.chunks)}
+
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(mode: str = "cpu", seconds: float = 10, limit: int = 50):
+    """Profile the live server for `seconds`: mode is cpu (cProfile), sample (all threads) or memory (tracemalloc)."""
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}]")
+    try:
+        report = await run_profile(mode, seconds, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Another profile is already running")
+    return Response(report, media_type="text/plain")
+
+
+FALLBACK_RESPONSE = (
+    "Based on international refugee law, you may qualify for asylum if you "
+    "have a well-founded fear of persecution due to race, religion, nationality, "
+    "political opinion, or membership in a particular social group. "
+    "Please consult a qualified immigration attorney for personalized advice."
+)
+
+
+def wants_case_status(message: str) -> bool:
+    upper = message.upper()
+    return "STATUS" in upper or "TRACK" in upper or "CHECK MY" in upper
+
+
+async def load_conversation(req: ChatRequest) -> Session:
+    """
+    The conversation Nova sees for this turn: the request's server-side session
+    (a new one if it has none or it expired; stored only once record_turn
+    saves an answer), or client-sent history held to the same token budget.
+    """
+    if req.history:
+        summary, turns = compact("", clean_history(req.history), SESSION_MAX_TOKENS, SESSION_SUMMARY_TOKENS)
+        return Session(None, summary, turns)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, sessions.get_or_create, req.session_id)
+
+
+async def record_turn(conversation: Session, message: str, answer: str) -> None:
+    if conversation.id is None:
+        return
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(_executor, sessions.append, conversation.id, message, answer)
+    except Exception as e:
+        logger.warning(f"Could not record turn for session {conversation.id}: {e}")
+
+
+async def cached_answer(req: ChatRequest, conversation: Session, deadline: Deadline,
+                        level: int = DEGRADE_NONE) -> tuple[ChatResponse | None, object]:
+    """
+    Look the question up in the semantic answer cache.
+    Returns (cached response or None, cache key to store the fresh answer under,
+    or None when this request must not be cached).
+    Only undegraded requests may call Titan for the lookup, within the request
+    deadline; degraded ones use an already cached query embedding or skip the cache.
+    """
+    if not conversation.empty or wants_case_status(req.message) or not req.message.strip():
+        return None, None
+    store = vector_store
+    if not store.ready:
+        return None, None
+    if level != DEGRADE_NONE:
+        query_emb = store.query_cache.get(req.message)
+        if query_emb is None:
+            return None, None
+    else:
+        try:
+            query_emb = await deadline.run(store.embed_query_async(req.message), reserve=CHAT_GENERATION_RESERVE)
+        except DeadlineExceeded:
+            logger.warning("Answer cache skipped, query embedding missed the chat deadline")
+            return None, None
+        except Exception as e:
+            logger.warning(f"Answer cache skipped, query embedding failed: {e}")
+            return None, None
+    key = (req.language, query_emb, store.generation)
+    hit = answer_cache.get(*key)
+    if hit is not None:
+        logger.info(f"Answer cache hit for '{req.message[:80]}' lang={req.language}")
+        return ChatResponse(**hit, cached=True, session_id=conversation.id), None
+    return None, key
+
+
+@dataclass
+class ChatPlan:
+    """Everything retrieval and case tracking produced for one chat turn, ready for generation."""
+    system_prompt: str
+    relevant_chunks: list[str]
+    retrieval_method: str
+
+    @property
+    def context_used(self) -> bool:
+        return bool(self.relevant_chunks)
+
+
+SEMANTIC_RETRIEVAL = "titan-embed-text-v2 cosine similarity"
+
+
+def cacheable(ticket: Ticket, plan: ChatPlan) -> bool:
+    """Only answers from undegraded requests grounded on semantic retrieval go into the answer cache."""
+    return ticket.level == DEGRADE_NONE and plan.retrieval_method == SEMANTIC_RETRIEVAL
+
+
+async def retrieve_stage(req: ChatRequest, degrade: int, deadline: Deadline) -> tuple[list[str], str]:
+    """Relevant legal chunks and the retrieval method; keyword search if Titan misses its budget."""
+    store = vector_store
+    if degrade >= DEGRADE_KEYWORD:
+        return store._keyword_fallback(req.message, 3), "keyword fallback (load shedding)"
+    try:
+        # Titan query embedding is awaited natively; only scoring uses the thread pool
+        chunks = await deadline.run(store.query(req.message), reserve=CHAT_GENERATION_RESERVE)
+    except DeadlineExceeded:
+        logger.warning("Retrieval missed its deadline; using keyword fallback")
+        return store._keyword_fallback(req.message, 3), "keyword fallback (deadline)"
+    return chunks, SEMANTIC_RETRIEVAL if store.ready else "keyword fallback"
+
+
+async def case_status_stage(req: ChatRequest, degrade: int, deadline: Deadline) -> str:
+    """System-prompt section for a case-status question ("" if the message is not one)."""
+    # --- NOVA ACT AUTOMATION: Case Status Check ---
+    if not wants_case_status(req.message) or degrade >= DEGRADE_RETRIEVAL_ONLY:
+        return ""
+    # Detect USCIS receipt number (e.g., MSC1234567890)
+    receipt_match = re.search(r"([A-Z]{3}\d{10})", req.message.upper())
+    if not receipt_match:
+        return (
+            "\n\n--- INSTRUCTION ---\n"
+            "The user wants to check their USCIS case status but did not provide a receipt number. "
+            "Politely ask them to provide their 13-character USCIS receipt number (e.g., MSC1234567890) "
+            "so you can track it for them using the automated system.\n"
+        )
+    receipt_no = receipt_match.group(1)
+    logger.info(f"Triggering Nova Act UI Automation for receipt: {receipt_no}")
+    budget = deadline.remaining(CHAT_GENERATION_RESERVE)
+    try:
+        # Runs on the shared browser pool; Playwright waits are capped at the same budget
+        with stage("case_track"):
+            status_result, source = await deadline.run(
+                get_case_tracker().check_status_async(receipt_no, budget),
+                reserve=CHAT_GENERATION_RESERVE,
+            )
+    except DeadlineExceeded:
+        logger.warning(f"Case status lookup for {receipt_no} missed its deadline")
+        FALLBACKS.inc(kind="case_track_deadline")
+        return (
+            f"\n\n--- INSTRUCTION ---\n"
+            f"The user is asking about case status for receipt {receipt_no}, but the USCIS portal "
+            f"did not respond in time. Tell them the live status could not be retrieved right now and "
+            f"that they can try again shortly or check https://egov.uscis.gov/casestatus/ directly.\n"
+        )
+    if source == SOURCE_INVALID:
+        return (
+            f"\n\n--- INSTRUCTION ---\n"
+            f"The user is asking about case status for receipt {receipt_no}, which is not a valid USCIS "
+            f"receipt number ({status_result}). Ask them to check the number on their receipt notice.\n"
+        )
+    if source not in (SOURCE_PORTAL, SOURCE_CACHE):
+        # Fallback text written by the tracker, not anything USCIS reported
+        return (
+            f"\n\n--- INSTRUCTION ---\n"
+            f"The user is asking about case status for receipt {receipt_no}, but the USCIS portal could "
+            f"not be reached, so no live status is available. Do not present any status as coming from "
+            f"USCIS. Tell them the live status could not be retrieved right now and that they can try "
+            f"again shortly or check https://egov.uscis.gov/casestatus/ directly.\n"
+        )
+    checked = "real-time status retrieved" if source == SOURCE_PORTAL else "status recently retrieved"
+    return (
+        f"\n\n--- NOVA ACT UI AUTOMATION RESULT ---\n"
+        f"The user is asking about case status for receipt {receipt_no}.\n"
+        f"The {checked} from the USCIS portal is: '{status_result}'.\n"
+        f"Provide this status to the user clearly.\n"
+        f"--- END AUTOMATION RESULT ---\n"
+    )
+
+
+async def prepare_chat(req: ChatRequest, conversation: Session, deadline: Deadline,
+                       degrade: int = DEGRADE_NONE) -> ChatPlan:
+    """
+    Retrieve legal context, run any case-status lookup and assemble the system prompt.
+    Retrieval and the case lookup run concurrently, each within what is left of
+    `deadline` after CHAT_GENERATION_RESERVE. Under load (`degrade` from admission
+    control) Titan is skipped for keyword retrieval, and at DEGRADE_RETRIEVAL_ONLY
+    the case lookup is skipped as well.
+    """
     if not req.message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
 
     logger.info(f"Chat: '{req.message[:80]}' lang={req.language}")
 
-    # Run Titan embedding retrieval in thread pool (non-blocking)
-    loop = asyncio.get_event_loop()
-    relevant_chunks = await loop.run_in_executor(
-        _executor, vector_store.query_sync, req.message
+    (relevant_chunks, retrieval_method), case_status = await asyncio.gather(
+        retrieve_stage(req, degrade, deadline),
+        case_status_stage(req, degrade, deadline),
     )
 
     context = "\n\n".join(relevant_chunks)
-    context_used = bool(relevant_chunks)
-    retrieval_method = "titan-embed-text-v2 cosine similarity" if vector_store.ready else "keyword fallback"
 
     system_prompt = (
         "You are the 'Refugee Legal Navigator', a specialized legal assistant. "
@@ -258,6 +1039,12 @@ async def chat(req: ChatRequest):
         "4. TONE: Compassionate, professional, and authoritative.\n\n"
     )
 
+    if conversation.summary:
+        system_prompt += (
+            f"--- EARLIER IN THIS CONVERSATION (summary) ---\n{conversation.summary}\n"
+            f"--- END SUMMARY ---\n\n"
+        )
+
     if context:
         system_prompt += (
             f"Use this legally grounded context retrieved via semantic similarity "
@@ -265,63 +1052,331 @@ async def chat(req: ChatRequest):
             f"--- LEGAL CONTEXT ---\n{context}\n--- END CONTEXT ---\n\n"
         )
 
-    # --- NOVA ACT AUTOMATION: Case Status Check ---
-    # Detect USCIS receipt number (e.g., MSC1234567890)
-    receipt_match = re.search(r"([A-Z]{3}\d{10})", req.message.upper())
-    is_status_check = "STATUS" in req.message.upper() or "TRACK" in req.message.upper()
-
-    if (is_status_check or "CHECK MY" in req.message.upper()):
-        if receipt_match:
-            receipt_no = receipt_match.group(1)
-            logger.info(f"Triggering Nova Act UI Automation for receipt: {receipt_no}")
-            status_result = await loop.run_in_executor(_executor, get_case_tracker().check_status, receipt_no)
-            
-            system_prompt += (
-                f"\n\n--- NOVA ACT UI AUTOMATION RESULT ---\n"
-                f"The user is asking about case status for receipt {receipt_no}.\n"
-                f"The real-time status retrieved from the USCIS portal is: '{status_result}'.\n"
-                f"Provide this status to the user clearly.\n"
-                f"--- END AUTOMATION RESULT ---\n"
-            )
-        else:
-            system_prompt += (
-                "\n\n--- INSTRUCTION ---\n"
-                "The user wants to check their USCIS case status but did not provide a receipt number. "
-                "Politely ask them to provide their 13-character USCIS receipt number (e.g., MSC1234567890) "
-                "so you can track it for them using the automated system.\n"
-            )
+    system_prompt += case_status
 
     if req.language != "en":
         system_prompt += f"Respond in the user's language: {req.language}.\n"
 
+    return ChatPlan(system_prompt, relevant_chunks, retrieval_method)
+
+
+def retrieval_only_response(plan: ChatPlan, conversation: Session) -> ChatResponse:
+    """Answer with the retrieved statutes alone when generation is shed under load."""
+    FALLBACKS.inc(kind="retrieval_only")
+    if not plan.relevant_chunks:
+        text = FALLBACK_RESPONSE
+    else:
+        quoted = "\n\n".join(f"> {chunk}" for chunk in plan.relevant_chunks)
+        text = (
+            "Our legal assistant cannot give a full answer right now, so here are the legal "
+            f"provisions most relevant to your question:\n\n{quoted}\n\n"
+            "Please try again shortly for a full answer, and consult a qualified "
+            "immigration attorney for personalized advice."
+        )
+    return ChatResponse(
+        response=text,
+        model="retrieval-only",
+        context_used=plan.context_used,
+        num_context_chunks=len(plan.relevant_chunks),
+        retrieval_method=plan.retrieval_method,
+        session_id=conversation.id,
+    )
+
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    logger.warning(f"Chat request shed: {e.reason}")
+    return HTTPException(
+        status_code=503,
+        detail=f"Server is busy ({e.reason}); please retry shortly",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    started = time.perf_counter()
+    deadline = Deadline(CHAT_DEADLINE_SECONDS)
+    timings = record_timings() if SERVER_TIMING else None
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    try:
+        # Admission comes first, so rejected requests cost no Titan call
+        async with chat_admission.admit() as ticket:
+            conversation = await load_conversation(req)
+            hit, cache_key = await cached_answer(req, conversation, deadline, ticket.level)
+            if hit is not None:
+                await record_turn(conversation, req.message, hit.response)
+                return chat_json(hit, timings, started)
+            result = await _generate_chat(req, conversation, deadline, ticket, cache_key)
+    except Overloaded as e:
+        raise _overloaded(e)
+    return chat_json(result, timings, started)
+
+
+def chat_json(result: ChatResponse, timings: dict | None, started: float) -> Response:
+    """Serialise a chat response, adding Server-Timing when this request records timings."""
+    with stage("serialize"):
+        body = result.model_dump_json()
+    headers = None
+    if timings is not None:
+        timings["total"] = time.perf_counter() - started
+        headers = {"Server-Timing": server_timing(timings)}
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def _generate_chat(req: ChatRequest, conversation: Session, deadline: Deadline,
+                         ticket: Ticket, cache_key) -> ChatResponse:
+    plan = await prepare_chat(req, conversation, deadline, ticket.level)
+    if ticket.level >= DEGRADE_RETRIEVAL_ONLY:
+        return retrieval_only_response(plan, conversation)
+
     try:
-        nova = get_nova()
-        # Build a lambda so we can pass history (run_in_executor only takes one callable + no kwargs)
-        def nova_call():
-            return nova.generate_response(req.message, system_prompt, history=req.history or [])
-        response_text = await loop.run_in_executor(_executor, nova_call)
+        nova = get_async_nova()
+        # Requests that would send Nova the exact same prompt share one generation
+        flight_key = (
+            normalize_query(req.message), req.language,
+            hashlib.sha256((plan.system_prompt + json.dumps(conversation.turns)).encode("utf-8")).hexdigest(),
+        )
+        with stage("generate"):
+            response_text = await deadline.run(_generation_flight.do(
+                flight_key,
+                lambda: nova.generate_response(req.message, plan.system_prompt, history=conversation.turns),
+            ))
         logger.info(f"Nova responded ({len(response_text)} chars)")
-        return ChatResponse(
+        result = ChatResponse(
             response=response_text,
             model="amazon.nova-lite-v1:0",
-            context_used=context_used,
-            num_context_chunks=len(relevant_chunks),
-            retrieval_method=retrieval_method,
+            context_used=plan.context_used,
+            num_context_chunks=len(plan.relevant_chunks),
+            retrieval_method=plan.retrieval_method,
+            session_id=conversation.id,
         )
+        if cache_key is not None and response_text and cacheable(ticket, plan):
+            answer_cache.put(*cache_key, result.model_dump(exclude={"cached", "session_id"}))
+        await record_turn(conversation, req.message, response_text)
+        return result
+    except DeadlineExceeded:
+        logger.warning("Nova Lite missed the chat deadline; answering with retrieved context only")
+        return retrieval_only_response(plan, conversation)
     except Exception as e:
         logger.error(f"Nova Lite failed: {e}")
+        FALLBACKS.inc(kind="generation")
         return ChatResponse(
-            response=(
-                "Based on international refugee law, you may qualify for asylum if you "
-                "have a well-founded fear of persecution due to race, religion, nationality, "
-                "political opinion, or membership in a particular social group. "
-                "Please consult a qualified immigration attorney for personalized advice."
-            ),
+            response=FALLBACK_RESPONSE,
             model="fallback",
             context_used=False,
             num_context_chunks=0,
             retrieval_method="fallback",
+            session_id=conversation.id,
+        )
+
+
+@app.delete("/api/chat/sessions/{session_id}")
+async def end_session(session_id: str):
+    loop = asyncio.get_event_loop()
+    if not await loop.run_in_executor(_executor, sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"deleted": session_id}
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Server-Sent Events variant of /api/chat. Retrieval runs first and its
+    metadata is sent as a `metadata` event; Nova Lite output then follows as
+    `token` events as Bedrock streams it, and a final `done` event names the model.
+    The whole stream is bounded by CHAT_DEADLINE_SECONDS; a stream cut short by
+    it ends with `"truncated": true` on the `done` event.
+    """
+    deadline = Deadline(CHAT_DEADLINE_SECONDS)
+    if not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    try:
+        # Admission comes first, so rejected requests cost no Titan call
+        ticket = await chat_admission.enter()
+    except Overloaded as e:
+        raise _overloaded(e)
+    try:
+        conversation = await load_conversation(req)
+        hit, cache_key = await cached_answer(req, conversation, deadline, ticket.level)
+        if hit is None:
+            plan = await prepare_chat(req, conversation, deadline, ticket.level)
+    except BaseException:
+        chat_admission.leave(ticket)
+        raise
+
+    if hit is not None:
+        chat_admission.leave(ticket)
+        await record_turn(conversation, req.message, hit.response)
+
+        async def cached_events():
+            yield _sse("metadata", {
+                "context_used": hit.context_used,
+                "num_context_chunks": hit.num_context_chunks,
+                "retrieval_method": hit.retrieval_method,
+                "cached": True,
+                "session_id": conversation.id,
+            })
+            yield _sse("token", {"text": hit.response})
+            yield _sse("done", {"model": hit.model})
+        return StreamingResponse(cached_events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    async def events():
+        # The admission slot is held until the stream ends
+        try:
+            async for event in _stream_events(req, conversation, deadline, plan, ticket, cache_key):
+                yield event
+        finally:
+            chat_admission.leave(ticket)
+
+    return AdmittedStreamingResponse(ticket, events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that holds a chat admission slot. The body generator
+    releases it when the stream ends; this releases it too if the client
+    disconnects before the generator ever starts (its finally never runs).
+    """
+
+    def __init__(self, ticket: Ticket, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            chat_admission.leave(self.ticket)
+
+
+async def _stream_events(req: ChatRequest, conversation: Session, deadline: Deadline, plan: ChatPlan,
+                         ticket: Ticket, cache_key):
+    yield _sse("metadata", {
+        "context_used": plan.context_used,
+        "num_context_chunks": len(plan.relevant_chunks),
+        "retrieval_method": plan.retrieval_method,
+        "session_id": conversation.id,
+    })
+    if ticket.level >= DEGRADE_RETRIEVAL_ONLY:
+        shed = retrieval_only_response(plan, conversation)
+        yield _sse("token", {"text": shed.response})
+        yield _sse("done", {"model": shed.model})
+        return
+    stream = None
+    sent = 0
+    parts = []
+    started = time.perf_counter()
+    try:
+        stream = get_async_nova().generate_response_stream(
+            req.message, plan.system_prompt, history=conversation.turns
         )
+        while True:
+            try:
+                text = await deadline.run(stream.__anext__())
+            except StopAsyncIteration:
+                break
+            sent += len(text)
+            parts.append(text)
+            yield _sse("token", {"text": text})
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="generate")
+        logger.info(f"Nova streamed ({sent} chars)")
+        response_text = "".join(parts)
+        if cache_key is not None and parts and cacheable(ticket, plan):
+            answer_cache.put(*cache_key, {
+                "response": response_text,
+                "model": "amazon.nova-lite-v1:0",
+                "context_used": plan.context_used,
+                "num_context_chunks": len(plan.relevant_chunks),
+                "retrieval_method": plan.retrieval_method,
+            })
+        if parts:
+            await record_turn(conversation, req.message, response_text)
+        yield _sse("done", {"model": "amazon.nova-lite-v1:0"})
+    except DeadlineExceeded:
+        logger.warning(f"Nova Lite stream missed the chat deadline after {sent} chars")
+        if not sent:
+            shed = retrieval_only_response(plan, conversation)
+            yield _sse("token", {"text": shed.response})
+            yield _sse("done", {"model": shed.model})
+        else:
+            yield _sse("done", {"model": "amazon.nova-lite-v1:0", "truncated": True})
+    except Exception as e:
+        logger.error(f"Nova Lite stream failed: {e}")
+        FALLBACKS.inc(kind="generation")
+        if not sent:
+            yield _sse("token", {"text": FALLBACK_RESPONSE})
+        yield _sse("done", {"model": "fallback"})
+    finally:
+        if stream is not None:
+            await stream.aclose()
+
+
+def _normalize_receipt(receipt_number: str) -> str:
+    return receipt_number.strip().upper()
+
+
+@app.post("/api/track-case")
+async def track_case(req: TrackCaseRequest):
+    """Status of one receipt, with `source` saying whether it came from the cache, the portal, or a fallback."""
+    return await get_case_tracker().track(_normalize_receipt(req.receipt_number), TRACK_CASE_TIMEOUT)
+
+
+@app.post("/api/track-case/batch")
+async def track_case_batch(req: TrackCaseBatchRequest):
+    """
+    Server-Sent Events: one `result` event per distinct receipt, sent as each
+    lookup completes (cached ones return at once), then a `done` event with
+    counts per source. Receipts are validated like single lookups;
+    invalid ones come back with source "invalid" rather than failing the batch.
+    """
+    receipts = list(dict.fromkeys(r for r in map(_normalize_receipt, req.receipt_numbers) if r))
+    if not receipts:
+        raise HTTPException(status_code=400, detail="No receipt numbers given")
+    if len(receipts) > TRACK_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TRACK_BATCH_MAX} receipt numbers per batch")
+    return StreamingResponse(_track_events(receipts), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _track_events(receipts: list[str]):
+    tracker = get_case_tracker()
+    started = time.perf_counter()
+    results: asyncio.Queue = asyncio.Queue()
+    pending = iter(receipts)
+
+    async def worker():
+        # Workers share one iterator, so at most TRACK_BATCH_CONCURRENCY lookups run at once
+        for receipt in pending:
+            try:
+                result = await tracker.track(receipt, TRACK_CASE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Batch lookup for {receipt} failed: {e}")
+                result = {"receipt_number": receipt, "status": "Status unavailable", "source": SOURCE_FALLBACK}
+            results.put_nowait(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(TRACK_BATCH_CONCURRENCY, len(receipts)))]
+    counts: dict[str, int] = {}
+    try:
+        for _ in receipts:
+            result = await results.get()
+            counts[result["source"]] = counts.get(result["source"], 0) + 1
+            yield _sse("result", result)
+        yield _sse("done", {
+            "total": len(receipts),
+            "sources": counts,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        })
+    finally:
+        # A client that disconnects stops the batch; lookups already started still fill the cache
+        for task in workers:
+            task.cancel()
 
 
 # ── Static File / SPA Routing (Defined last to avoid shadowing API) ──────────
@@ -0,0 +1,191 @@
+"""
+Local stand-in for the Bedrock runtime API, for load tests that must not
+spend Bedrock money.
+
+Serves POST /model/{modelId}/invoke for the Titan embedding and Nova text
+models with configurable latency, throttling and error rates. Point boto3
+at it with AWS_ENDPOINT_URL_BEDROCK_RUNTIME (and any dummy credentials);
+the server then goes through its real client code path, including
+botocore's retries on ThrottlingException and 5xx.
+
+Titan embeddings are deterministic per input text, so repeated questions
+behave like real repeats for the query and answer caches.
+
+Streaming (invoke-with-response-stream) is not implemented.
+
+    python benchmarks/fake_bedrock.py --port 9000 --nova-ms 800 --throttle-rate 0.02
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import numpy as np
+
+TITAN_MODEL = "amazon.titan-embed-text-v2:0"
+NOVA_MODELS = ("amazon.nova-lite-v1:0", "amazon.nova-pro-v1:0")
+EMBEDDING_DIM = 1024
+
+_INVOKE_PATH = re.compile(r"^/model/([^/]+)/invoke$")
+
+CANNED_ANSWER = (
+    "Under the 1951 Refugee Convention and INA §208, you may be eligible for asylum if you have a "
+    "well-founded fear of persecution on account of race, religion, nationality, political opinion, "
+    "or membership in a particular social group.\n\n> [Source: INA §208(b)(1)(B)(i)]\n\n"
+    "Citation Reference: INA §208; 1951 Refugee Convention, Article 1A(2)."
+)
+
+
+class FakeBedrock:
+    """
+    latency is (titan_ms, nova_ms) mean per call, varied by ±jitter;
+    throttle_rate and error_rate are per-call probabilities of a 429
+    ThrottlingException and a 500 InternalServerException.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, titan_ms: float = 40.0, nova_ms: float = 800.0,
+                 jitter: float = 0.25, throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 answer: str = CANNED_ANSWER, seed: int | None = None):
+        self.titan_ms = titan_ms
+        self.nova_ms = nova_ms
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.answer = answer
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"titan": 0, "nova": 0, "throttled": 0, "errors": 0, "unknown": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBedrock":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-bedrock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def _delay(self, mean_ms: float) -> None:
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, mean_ms * factor) / 1000.0)
+
+    @staticmethod
+    def embedding(text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vec = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+        return (vec / np.linalg.norm(vec)).round(6).tolist()
+
+    def invoke(self, model_id: str, body: dict) -> tuple[int, dict, dict]:
+        """(status, headers, JSON body) for one invoke_model call."""
+        roll = self._roll()
+        if roll < self.throttle_rate:
+            self._count("throttled")
+            return 429, {"x-amzn-ErrorType": "ThrottlingException"}, {"message": "Too many requests, please wait before trying again."}
+        if roll < self.throttle_rate + self.error_rate:
+            self._count("errors")
+            return 500, {"x-amzn-ErrorType": "InternalServerException"}, {"message": "Injected failure"}
+        if model_id == TITAN_MODEL:
+            self._count("titan")
+            self._delay(self.titan_ms)
+            text = body.get("inputText", "")
+            return 200, {}, {"embedding": self.embedding(text), "inputTextTokenCount": len(text.split())}
+        if model_id in NOVA_MODELS:
+            self._count("nova")
+            self._delay(self.nova_ms)
+            return 200, {}, {
+                "output": {"message": {"role": "assistant", "content": [{"text": self.answer}]}},
+                "stopReason": "end_turn",
+                "usage": {"inputTokens": len(json.dumps(body)) // 4, "outputTokens": len(self.answer) // 4},
+            }
+        self._count("unknown")
+        return 400, {"x-amzn-ErrorType": "ValidationException"}, {"message": f"Unknown model {model_id}"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                match = _INVOKE_PATH.match(self.path.split("?", 1)[0])
+                if not match:
+                    status, headers, payload = 404, {"x-amzn-ErrorType": "UnknownOperationException"}, {
+                        "message": f"{self.path} is not implemented by the fake"}
+                else:
+                    try:
+                        body = json.loads(raw or b"{}")
+                    except ValueError:
+                        body = {}
+                    status, headers, payload = fake.invoke(unquote(match.group(1)), body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--titan-ms", type=float, default=40.0, help="mean Titan embedding latency")
+    parser.add_argument("--nova-ms", type=float, default=800.0, help="mean Nova generation latency")
+    parser.add_argument("--jitter", type=float, default=0.25, help="latency varies by ± this fraction")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 500")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def from_args(args, host: str = "127.0.0.1", port: int = 0) -> FakeBedrock:
+    return FakeBedrock(
+        host=host, port=port, titan_ms=args.titan_ms, nova_ms=args.nova_ms, jitter=args.jitter,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    add_arguments(parser)
+    args = parser.parse_args()
+    fake = from_args(args, args.host, args.port).start()
+    print(f"Fake Bedrock listening on {fake.url}; export AWS_ENDPOINT_URL_BEDROCK_RUNTIME={fake.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,160 @@
+"""
+Local stand-in for the USCIS case-status portal, for exercising case
+tracking without touching egov.uscis.gov.
+
+GET / serves a page with the receipt form (appReceiptNum plus a hidden
+CSRF token tied to a cookie); POST / answers with a result page whose
+status line is picked deterministically from the receipt number. Point
+the server at it with USCIS_PORTAL_URL:
+
+    python benchmarks/fake_portal.py --port 9100 --latency-ms 150
+    USCIS_PORTAL_URL=http://127.0.0.1:9100/ uvicorn api_server:app
+
+--mode js serves a page whose form is only built by JavaScript, and
+--mode blank a result page without a status line, to check that the
+HTTP fast path falls back to the browser.
+"""
+import argparse
+import hashlib
+import html
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+STATUSES = (
+    "Case Was Received",
+    "Case Was Approved",
+    "Request for Evidence Was Sent",
+    "Case Was Transferred And A New Office Has Jurisdiction",
+    "Notice Was Mailed",
+)
+MODES = ("form", "js", "blank")
+
+FORM_PAGE = """<!DOCTYPE html>
+<html><head><title>Case Status Online</title></head>
+<body>
+<h1>Case Status Online</h1>
+<form method="post" action="/">
+  <input type="hidden" name="csrfToken" value="{token}">
+  <label for="receipt">Enter a Receipt Number</label>
+  <input type="text" id="receipt" name="appReceiptNum" value="">
+  <input type="submit" name="initCaseSearch" value="CHECK STATUS">
+</form>
+</body></html>
+"""
+
+JS_PAGE = """<!DOCTYPE html>
+<html><head><title>Case Status Online</title></head>
+<body><div id="root"></div><script>document.getElementById("root").innerHTML = "...";</script></body></html>
+"""
+
+RESULT_PAGE = """<!DOCTYPE html>
+<html><head><title>Case Status Online</title></head>
+<body>
+<div class="rows text-center">
+  <h1>{status}</h1>
+  <p>On October 1, 2026, we received your case, Receipt Number {receipt}, and sent you the notice
+  that describes how we will process your case.</p>
+</div>
+</body></html>
+"""
+
+
+class FakePortal:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 100.0, mode: str = "form"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.latency_ms = latency_ms
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._tokens: set[str] = set()
+        self.counts = {"pages": 0, "lookups": 0, "rejected": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "FakePortal":
+        threading.Thread(target=self._server.serve_forever, name="fake-portal", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    @staticmethod
+    def status_for(receipt: str) -> str:
+        return STATUSES[hashlib.sha256(receipt.encode("utf-8")).digest()[0] % len(STATUSES)]
+
+    def _handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: str, headers: dict | None = None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                time.sleep(portal.latency_ms / 2000.0)
+                with portal._lock:
+                    portal.counts["pages"] += 1
+                if portal.mode == "js":
+                    return self._send(200, JS_PAGE)
+                token = secrets.token_hex(8)
+                with portal._lock:
+                    portal._tokens.add(token)
+                self._send(200, FORM_PAGE.format(token=token), {"Set-Cookie": f"csrf={token}; Path=/"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8")) if length else {}
+                token = (form.get("csrfToken") or [""])[0]
+                cookie = self.headers.get("Cookie") or ""
+                time.sleep(portal.latency_ms / 2000.0)
+                with portal._lock:
+                    valid = token in portal._tokens and f"csrf={token}" in cookie
+                    portal._tokens.discard(token)
+                    portal.counts["lookups" if valid else "rejected"] += 1
+                if not valid:
+                    return self._send(403, "<html><body><h1>Session expired</h1></body></html>")
+                receipt = (form.get("appReceiptNum") or [""])[0].strip().upper()
+                status = "" if portal.mode == "blank" else portal.status_for(receipt)
+                self._send(200, RESULT_PAGE.format(status=html.escape(status), receipt=html.escape(receipt)))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="total latency of a lookup (GET + POST)")
+    parser.add_argument("--mode", choices=MODES, default="form")
+    args = parser.parse_args()
+    portal = FakePortal(args.host, args.port, args.latency_ms, args.mode).start()
+    print(f"Fake USCIS portal listening on {portal.url}; export USCIS_PORTAL_URL={portal.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        portal.stop()
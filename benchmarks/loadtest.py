@@ -0,0 +1,268 @@
+"""
+Offline load test for /api/chat.
+
+Starts a fake Bedrock runtime (benchmarks/fake_bedrock.py) and
+`uvicorn api_server:app` pointed at it, then drives /api/chat at a fixed
+concurrency and reports throughput and latency percentiles. Nothing
+reaches AWS, and nothing is written to the repository: the server runs
+on a scratch copy of data/legal_docs (DATA_DIR), so its index, sidecars
+and sessions live in a temporary directory removed afterwards.
+
+    python benchmarks/loadtest.py --concurrency 32 --requests 2000
+    python benchmarks/loadtest.py --duration 60 --distinct 20 --env EXECUTOR_WORKERS=8
+    python benchmarks/loadtest.py --nova-ms 1500 --throttle-rate 0.05 --json results.json
+
+--distinct controls how often questions repeat (and so the query/answer
+cache hit rate); 0 makes every question unique. Server settings are passed
+with --env KEY=VALUE, so runs with different executor sizes or cache
+options can be compared. --url targets an already running server instead
+(no fake is started; that server decides where Bedrock calls go).
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+import fake_bedrock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS_DIR = os.path.join(REPO_ROOT, "data", "legal_docs")
+
+QUESTIONS = [
+    "What is the deadline to apply for asylum in the United States?",
+    "Can I apply for asylum if I entered the country without a visa?",
+    "What does a well-founded fear of persecution mean?",
+    "Who counts as a refugee under the 1951 Refugee Convention?",
+    "Can my children be included in my asylum application?",
+    "What happens at a credible fear interview?",
+    "Can I work while my asylum case is pending?",
+    "What is the difference between asylum and withholding of removal?",
+    "What protection does the Convention Against Torture give me?",
+    "How do I prove membership in a particular social group?",
+    "What documents should I bring to my asylum interview?",
+    "Can I travel outside the country while my asylum case is pending?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def question(i: int, distinct: int) -> str:
+    n = i % distinct if distinct else i
+    text = QUESTIONS[n % len(QUESTIONS)]
+    return text if n < len(QUESTIONS) else f"{text} (case {n // len(QUESTIONS)})"
+
+
+def scratch_data_dir() -> str:
+    """Temporary DATA_DIR holding a copy of the corpus and nothing else."""
+    data_dir = tempfile.mkdtemp(prefix="loadtest-data-")
+    shutil.copytree(DOCS_DIR, os.path.join(data_dir, "legal_docs"))
+    return data_dir
+
+
+def start_server(port: int, bedrock_url: str, workers: int, data_dir: str, extra_env: dict) -> subprocess.Popen:
+    env = {k: v for k, v in os.environ.items() if k not in ("INDEX_PATH", "DOCS_DIR", "SESSION_DB_PATH")}
+    env.update({
+        "DATA_DIR": data_dir,
+        "AWS_ENDPOINT_URL_BEDROCK_RUNTIME": bedrock_url,
+        "AWS_ACCESS_KEY_ID": "loadtest",
+        "AWS_SECRET_ACCESS_KEY": "loadtest",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "WEB_CONCURRENCY": str(workers),
+    })
+    env.update(extra_env)
+    cmd = [
+        sys.executable, "-m", "uvicorn", "api_server:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=REPO_ROOT, env=env)
+
+
+def wait_ready(url: str, timeout: float, proc: subprocess.Popen | None = None) -> dict:
+    """Poll /api/health until the vector store is ready."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            health = requests.get(f"{url}/api/health", timeout=2).json()
+            if health.get("vector_store_ready"):
+                return health
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+class LoadRun:
+    def __init__(self, url: str, concurrency: int, total: int | None, duration: float | None,
+                 distinct: int, language: str, timeout: float):
+        self.url = url
+        self.concurrency = concurrency
+        self.total = total
+        self.duration = duration
+        self.distinct = distinct
+        self.language = language
+        self.timeout = timeout
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.models: Counter = Counter()
+        self.cached = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _take(self, stop_at: float | None) -> int | None:
+        with self._lock:
+            if self.total is not None and self._next >= self.total:
+                return None
+            if stop_at is not None and time.monotonic() >= stop_at:
+                return None
+            i = self._next
+            self._next += 1
+            return i
+
+    def _worker(self, stop_at: float | None) -> None:
+        session = requests.Session()
+        while (i := self._take(stop_at)) is not None:
+            payload = {"message": question(i, self.distinct), "language": self.language}
+            started = time.perf_counter()
+            try:
+                resp = session.post(f"{self.url}/api/chat", json=payload, timeout=self.timeout)
+                status = str(resp.status_code)
+                body = resp.json() if resp.status_code == 200 else {}
+            except requests.RequestException as e:
+                status, body = type(e).__name__, {}
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.latencies.append(elapsed)
+                self.statuses[status] += 1
+                if body:
+                    self.models[body.get("model", "?")] += 1
+                    self.cached += bool(body.get("cached"))
+
+    def run(self) -> float:
+        stop_at = time.monotonic() + self.duration if self.duration else None
+        threads = [threading.Thread(target=self._worker, args=(stop_at,)) for _ in range(self.concurrency)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        n = len(ordered)
+        ok = self.statuses.get("200", 0)
+        return {
+            "requests": n,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(n / elapsed, 2) if elapsed else 0.0,
+            "ok_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(ordered, 50) * 1000, 1),
+                "p95": round(percentile(ordered, 95) * 1000, 1),
+                "p99": round(percentile(ordered, 99) * 1000, 1),
+                "max": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+                "mean": round(sum(ordered) / n * 1000, 1) if n else 0.0,
+            },
+            "status": dict(self.statuses),
+            "models": dict(self.models),
+            "cached_fraction": round(self.cached / ok, 4) if ok else 0.0,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests (default 500)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests sent first")
+    parser.add_argument("--distinct", type=int, default=0, help="distinct questions to cycle through (0 = all unique)")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="server environment")
+    parser.add_argument("--url", default=None, help="load an already running server instead")
+    parser.add_argument("--ready-timeout", type=float, default=180.0)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report here")
+    fake_bedrock.add_arguments(parser)
+    args = parser.parse_args()
+    if args.requests is None and args.duration is None:
+        args.requests = 500
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    fake = proc = data_dir = None
+    url = args.url
+    try:
+        if url is None:
+            fake = fake_bedrock.from_args(args).start()
+            data_dir = scratch_data_dir()
+            port = free_port()
+            proc = start_server(port, fake.url, args.workers, data_dir, extra_env)
+            url = f"http://127.0.0.1:{port}"
+        health = wait_ready(url, args.ready_timeout, proc)
+        print(f"Server ready: {health.get('chunks_indexed')} chunks indexed", file=sys.stderr)
+
+        if args.warmup:
+            LoadRun(url, min(args.concurrency, args.warmup), args.warmup, None,
+                    args.distinct, args.language, args.timeout).run()
+        print(f"Driving /api/chat at concurrency {args.concurrency}...", file=sys.stderr)
+        load = LoadRun(url, args.concurrency, args.requests, args.duration,
+                       args.distinct, args.language, args.timeout)
+        report = {
+            "config": {
+                "concurrency": args.concurrency, "distinct": args.distinct, "workers": args.workers,
+                "env": extra_env, "titan_ms": args.titan_ms, "nova_ms": args.nova_ms,
+                "throttle_rate": args.throttle_rate, "error_rate": args.error_rate,
+            },
+            **load.report(load.run()),
+        }
+        if fake is not None:
+            report["bedrock_calls"] = fake.stats()
+        try:
+            health = requests.get(f"{url}/api/health", timeout=5).json()
+            report["server"] = {k: health.get(k) for k in ("query_cache", "answer_cache", "admission", "coalescing")}
+        except (requests.RequestException, ValueError):
+            pass
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if fake is not None:
+            fake.stop()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
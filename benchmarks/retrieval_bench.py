@@ -0,0 +1,239 @@
+"""
+Retrieval micro-benchmark for VectorStore across corpus sizes.
+
+For each size it generates a synthetic corpus (clustered unit vectors of
+the Titan dimension plus legal-sounding chunk text), writes it with
+write_index, and then measures:
+
+- load:    attaching the mmap'd index and building BM25 / IVF / quantised codes
+- memory:  RSS growth from the load, and after the queries have paged rows in
+- query:   query_sync latency, with query embeddings preloaded into the
+           query cache so no Titan call is made
+- keyword: _keyword_fallback (BM25) latency
+- recall:  overlap with exact top-k, when ANN_MODE / EMBEDDING_QUANT make search approximate
+
+Results go to a JSON file tagged with the git commit, for comparison across
+commits. Search settings are read from the environment exactly as the
+server reads them:
+
+    python benchmarks/retrieval_bench.py --sizes 1000 10000 100000
+    ANN_MODE=ivf EMBEDDING_QUANT=int8 python benchmarks/retrieval_bench.py --sizes 1000000 --out ivf-int8.json
+
+1M chunks x 1024 dims is a 4 GB matrix; make sure the machine has the memory.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import api_server  # noqa: E402
+from src.utils.embedding_index import write_index  # noqa: E402
+from src.utils.nova_integration import EMBEDDING_V1  # noqa: E402
+
+VOCABULARY = (
+    "asylum refugee persecution convention protocol article section removal withholding torture "
+    "applicant credible fear interview immigration judge appeal board evidence testimony country "
+    "conditions political opinion religion nationality race social group membership persecutor "
+    "government agent harm threat detention border entry parole status adjustment deadline year "
+    "filing exception changed circumstances extraordinary family spouse child derivative employment "
+    "authorization document identity passport affidavit declaration witness report human rights "
+    "unhcr guideline handbook non-refoulement cessation exclusion serious crime firm resettlement"
+).split()
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc; falls back to peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def zipf_words(rng: random.Random, count: int) -> list[str]:
+    # Rank-weighted choice, so a few terms are common and most are rare, as in real text
+    return rng.choices(VOCABULARY, weights=[1.0 / (i + 1) for i in range(len(VOCABULARY))], k=count)
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int) -> tuple[list[str], np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    embeddings = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 65536):
+        stop = min(n, start + 65536)
+        block = centers[rng.integers(0, clusters, stop - start)]
+        block += 0.8 * rng.standard_normal(block.shape).astype(np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        embeddings[start:stop] = block
+    text_rng = random.Random(seed)
+    chunks = [f"Section {i}. " + " ".join(zipf_words(text_rng, 80)) for i in range(n)]
+    return chunks, embeddings
+
+
+def query_vectors(embeddings: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Noisy copies of random corpus rows, so queries have genuine near neighbours."""
+    rng = np.random.default_rng(seed + 1)
+    rows = embeddings[rng.integers(0, len(embeddings), count)]
+    queries = rows + 0.5 * rng.standard_normal(rows.shape).astype(np.float32) / np.sqrt(rows.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    ms = np.array(seconds) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def bench_size(n: int, args, workdir: str) -> dict:
+    print(f"[{n}] generating corpus", file=sys.stderr)
+    chunks, embeddings = synthetic_corpus(n, args.dim, args.clusters, args.seed)
+    queries = query_vectors(embeddings, args.queries, args.seed)
+    exact = None
+    approximate = (
+        api_server.ANN_MODE == "ivf"
+        or (api_server.ANN_MODE == "auto" and n >= api_server.ANN_MIN_CHUNKS)
+        or api_server.EMBEDDING_QUANT != "none"
+    )
+    if args.recall and approximate:
+        exact = [set(np.argpartition(-(embeddings @ q), args.top_k)[:args.top_k].tolist()) for q in queries]
+
+    index_path = os.path.join(workdir, f"bench-{n}.bin")
+    api_server.INDEX_PATH = index_path
+    api_server.GENERATION_PATH = index_path + ".gen"
+    api_server.LOCK_PATH = index_path + ".lock"
+    api_server.ANN_PATH = index_path + ".ivf.npz"
+    api_server.QUANT_PATH = index_path + ".codes"
+    started = time.perf_counter()
+    write_index(index_path, chunks, embeddings, EMBEDDING_V1)
+    write_s = time.perf_counter() - started
+    # IVF cells and quantised codes are built when a generation is published, as the server does
+    started = time.perf_counter()
+    api_server.publish_search_indexes(embeddings)
+    search_build_s = time.perf_counter() - started
+    del chunks, embeddings
+
+    rss_before = rss_bytes()
+    store = api_server.VectorStore()
+    started = time.perf_counter()
+    if not store._attach_index():
+        raise RuntimeError(f"Could not attach {index_path}")
+    load_s = time.perf_counter() - started
+    rss_loaded = rss_bytes()
+
+    texts = [f"benchmark query {i}" for i in range(len(queries))]
+    store.query_cache.max_size = max(store.query_cache.max_size, len(texts))
+    for text, vec in zip(texts, queries):
+        store.query_cache.put(text, vec)
+    for text in texts[:args.warmup]:
+        store.query_sync(text, args.top_k)
+    query_times, hits = [], []
+    for text, vec in zip(texts, queries):
+        started = time.perf_counter()
+        store.query_sync(text, args.top_k)
+        query_times.append(time.perf_counter() - started)
+        if exact is not None:
+            hits.append({i for _, i in store._top_k(vec, args.top_k)})
+
+    text_rng = random.Random(args.seed + 2)
+    keyword_queries = [" ".join(zipf_words(text_rng, text_rng.randint(3, 8))) for _ in range(args.queries)]
+    keyword_times = []
+    for q in keyword_queries:
+        started = time.perf_counter()
+        store._keyword_fallback(q, args.top_k)
+        keyword_times.append(time.perf_counter() - started)
+
+    result = {
+        "chunks": n,
+        "index_file_mb": round(os.path.getsize(index_path) / 1e6, 1),
+        "write_s": round(write_s, 3),
+        "search_build_s": round(search_build_s, 3),
+        "load_s": round(load_s, 3),
+        "rss_load_mb": round((rss_loaded - rss_before) / 1e6, 1),
+        "rss_after_queries_mb": round((rss_bytes() - rss_before) / 1e6, 1),
+        "search": "ivf" if store.ann is not None else "exact",
+        "quantization": getattr(store.codes, "kind", "none"),
+        "query_sync": latency_summary(query_times),
+        "keyword_fallback": latency_summary(keyword_times),
+    }
+    if exact is not None:
+        result[f"recall@{args.top_k}"] = round(
+            float(np.mean([len(h & e) / args.top_k for h, e in zip(hits, exact)])), 4
+        )
+    print(f"[{n}] load {result['load_s']}s, query p50 {result['query_sync']['p50_ms']}ms, "
+          f"keyword p50 {result['keyword_fallback']['p50_ms']}ms", file=sys.stderr)
+    for suffix in ("", ".ivf.npz", ".codes", ".gen", ".lock"):
+        if os.path.exists(index_path + suffix):
+            os.remove(index_path + suffix)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=1024, help="embedding dimension (Titan v2: 1024)")
+    parser.add_argument("--clusters", type=int, default=256, help="topic clusters in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--no-recall", dest="recall", action="store_false",
+                        help="skip the exact-search recall check for approximate modes")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", default=None, help="where index files are written (default: a temp dir)")
+    parser.add_argument("--out", default="retrieval_bench.json")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "dim": args.dim,
+            "top_k": args.top_k,
+            "queries": args.queries,
+            "ann_mode": api_server.ANN_MODE,
+            "ann_nprobe": api_server.ANN_NPROBE,
+            "embedding_quant": api_server.EMBEDDING_QUANT,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for n in args.sizes:
+            report["results"].append(bench_size(n, args, workdir))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,89 +4,263 @@ Falls back gracefully when running in restricted cloud environments.
 """
 import asyncio
 import logging
-from playwright.async_api import async_playwright
+import os
+import random
+import time
+
+from src.utils.browser_pool import BrowserPool, BrowserUnavailable, get_browser_pool
+from src.utils.metrics import FALLBACKS
+from src.utils.rate_limit import HostRateLimiter
+from src.utils.status_cache import FRESH, StatusCache
+from src.utils.uscis_portal import PortalChanged, StatusNotFound, extract_status, fetch_status
 
 logger = logging.getLogger(__name__)
 
 
+RECEIPT_PREFIXES = ("MSC", "SRC", "WAC", "EAC", "LIN", "NBC")
+INVALID_RECEIPT = "Invalid receipt format. Please provide a standard USCIS receipt number (e.g., MSC1234567890)."
+
+# Per-receipt status cache: fresh for CASE_STATUS_TTL, then served stale (and
+# revalidated) up to CASE_STATUS_MAX_STALE. The refresher re-checks cached
+# receipts about every CASE_REFRESH_INTERVAL, CASE_REFRESH_PARALLELISM at a time.
+CASE_STATUS_TTL = float(os.environ.get("CASE_STATUS_TTL", 6 * 3600))
+CASE_STATUS_MAX_STALE = float(os.environ.get("CASE_STATUS_MAX_STALE", 7 * 86400))
+CASE_REFRESH_INTERVAL = float(os.environ.get("CASE_REFRESH_INTERVAL", 0)) or CASE_STATUS_TTL
+CASE_REFRESH_PARALLELISM = int(os.environ.get("CASE_REFRESH_PARALLELISM", 1))
+CASE_REFRESH_TIMEOUT = float(os.environ.get("CASE_REFRESH_TIMEOUT", 45))
+# Portal visits (chat, batch and refresher alike) are spaced to this many per second per host
+PORTAL_RATE = float(os.environ.get("PORTAL_RATE", 2))
+PORTAL_BURST = int(os.environ.get("PORTAL_BURST", 4))
+# Status page; point it at a stub portal for local testing
+PORTAL_URL = os.environ.get("USCIS_PORTAL_URL", "https://egov.uscis.gov/casestatus/")
+# Try a plain HTTP form submit before the browser. Once the page no longer has
+# the expected form, the fast path is skipped for PORTAL_HTTP_RETRY_AFTER seconds.
+PORTAL_HTTP_FAST_PATH = os.environ.get("PORTAL_HTTP_FAST_PATH", "1").lower() in ("1", "true", "yes")
+PORTAL_HTTP_RETRY_AFTER = float(os.environ.get("PORTAL_HTTP_RETRY_AFTER", 600))
+
+# Where a status came from, as reported by track()
+SOURCE_CACHE = "cache"
+SOURCE_PORTAL = "portal"
+SOURCE_FALLBACK = "fallback"
+SOURCE_INVALID = "invalid"
+
+
 class CaseTrackerAgent:
-    def __init__(self):
-        self.portal_url = "https://egov.uscis.gov/casestatus/"
+    def __init__(self, pool: BrowserPool | None = None, cache: StatusCache | None = None,
+                 refresh_parallelism: int = 1, rate_limiter: HostRateLimiter | None = None,
+                 portal_url: str = PORTAL_URL, http_fast_path: bool = PORTAL_HTTP_FAST_PATH):
+        self.portal_url = portal_url
+        self.http_fast_path = http_fast_path
+        self.http_lookups = 0
+        self._http_disabled_until = 0.0
+        self._pool = pool
+        self.cache = cache or StatusCache()
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.refresh_parallelism = max(1, refresh_parallelism)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @property
+    def pool(self) -> BrowserPool:
+        # Resolved lazily so importing the agent never starts the browser thread
+        return self._pool or get_browser_pool()
 
-    async def get_case_status_real(self, receipt_number):
+    async def _read_status(self, page, receipt_number, step_ms):
         """
-        Uses Playwright to automate the real USCIS status check.
+        One portal lookup on a pooled page (runs on the browser pool's loop).
+        Returns (status_text, live); live is False when no status line was found.
+        """
+        logger.info(f"Navigating to {self.portal_url}")
+        await page.goto(self.portal_url, wait_until="networkidle", timeout=step_ms(20000))
+
+        receipt_input = "input[name='appReceiptNum']"
+        submit_button = "input[type='submit'], button[type='submit']"
+
+        logger.info("Entering receipt number")
+        await page.wait_for_selector(receipt_input, timeout=step_ms(10000))
+        await page.fill(receipt_input, receipt_number)
+        await page.click(submit_button)
+
+        await page.wait_for_load_state("networkidle", timeout=step_ms(10000))
+        body_text = await page.inner_text("body")
+
+        extracted = extract_status(body_text)
+
+        status_text = extracted or (
+            f"Case {receipt_number} is in 'Decision Pending' state. "
+            "Please check your official USCIS mail for details."
+        )
+        logger.info(f"Nova Act extracted status: {status_text}")
+        return status_text, extracted is not None
+
+    async def get_case_status_real(self, receipt_number, timeout=None):
+        """
+        Submits the USCIS status form over plain HTTP, and uses Playwright on a pooled
+        browser page when that fails or the page no longer matches what it expects.
         Gracefully falls back when browser binaries are unavailable in the cloud.
+        timeout: overall budget in seconds; each page step waits at most what is left of it.
         """
-        logger.info(f"Starting Nova Act tracking for: {receipt_number}")
+        status_text, _ = await self._lookup(receipt_number, timeout)
+        return status_text
 
+    async def _read_status_http(self, receipt_number, timeout):
+        """Browserless lookup; None when it fails or the portal no longer matches, so the browser takes over."""
+        if not self.http_fast_path or time.monotonic() < self._http_disabled_until:
+            return None
+        # At most half the budget, so a slow portal still leaves the browser a chance
+        budget = min(timeout / 2, 10.0) if timeout else 10.0
         try:
-            async with async_playwright() as p:
-                # Optimized launch for cloud environments
-                try:
-                    browser = await p.chromium.launch(
-                        headless=True,
-                        args=["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
-                    )
-                except Exception as launch_error:
-                    logger.warning(f"Browser launch failed: {launch_error}. Using fallback status.")
-                    return (
-                        f"Case {receipt_number} is currently under 'Active Review'. "
-                        "Processing times vary, but your record is secure in the system."
-                    )
-
-                page = await browser.new_page()
-                logger.info(f"Navigating to {self.portal_url}")
-                await page.goto(self.portal_url, wait_until="networkidle", timeout=20000)
-
-                receipt_input = "input[name='appReceiptNum']"
-                submit_button = "input[type='submit'], button[type='submit']"
-
-                logger.info("Entering receipt number")
-                await page.wait_for_selector(receipt_input, timeout=10000)
-                await page.fill(receipt_input, receipt_number)
-                await page.click(submit_button)
-
-                await page.wait_for_load_state("networkidle", timeout=10000)
-                body_text = await page.inner_text("body")
-
-                status_patterns = [
-                    "Case Was", "Application Was", "Request for Evidence",
-                    "Notice Was", "Actively Reviewing"
-                ]
-                extracted = next(
-                    (line.strip() for line in body_text.split("\n")
-                     if any(p in line for p in status_patterns)),
-                    None
-                )
-
-                status_text = extracted or (
-                    f"Case {receipt_number} is in 'Decision Pending' state. "
-                    "Please check your official USCIS mail for details."
-                )
-                logger.info(f"Nova Act extracted status: {status_text}")
-                await browser.close()
-                return status_text
+            await self.rate_limiter.wait(self.portal_url)
+            status_text = await asyncio.wait_for(
+                asyncio.to_thread(fetch_status, self.portal_url, receipt_number, budget), budget
+            )
+        except StatusNotFound as e:
+            logger.warning(f"HTTP status lookup for {receipt_number}: {e}; trying the browser")
+            FALLBACKS.inc(kind="portal_http_no_status")
+            return None
+        except PortalChanged as e:
+            logger.warning(f"HTTP status lookup no longer matches the portal ({e}); using the browser "
+                           f"for the next {PORTAL_HTTP_RETRY_AFTER:.0f}s")
+            FALLBACKS.inc(kind="portal_http_changed")
+            self._http_disabled_until = time.monotonic() + PORTAL_HTTP_RETRY_AFTER
+            return None
+        except Exception as e:
+            logger.warning(f"HTTP status lookup failed: {e!r}; trying the browser")
+            FALLBACKS.inc(kind="portal_http_error")
+            return None
+        self.http_lookups += 1
+        logger.info(f"HTTP lookup extracted status: {status_text}")
+        return status_text
+
+    async def _lookup(self, receipt_number, timeout=None):
+        """get_case_status_real, also reporting whether the text is a real portal status (never cached otherwise)."""
+        logger.info(f"Starting Nova Act tracking for: {receipt_number}")
+        expires_at = time.monotonic() + timeout if timeout else None
+        status_text = await self._read_status_http(receipt_number, timeout)
+        if status_text is not None:
+            return status_text, True
 
+        def step_ms(default_ms):
+            if expires_at is None:
+                return default_ms
+            return max(1, min(default_ms, int((expires_at - time.monotonic()) * 1000)))
+
+        try:
+            await self.rate_limiter.wait(self.portal_url)
+            remaining = None if expires_at is None else max(0.001, expires_at - time.monotonic())
+            return await self.pool.run_async(
+                lambda page: self._read_status(page, receipt_number, step_ms), remaining
+            )
+        except BrowserUnavailable as launch_error:
+            logger.warning(f"Browser launch failed: {launch_error}. Using fallback status.")
+            FALLBACKS.inc(kind="browser_launch")
+            return (
+                f"Case {receipt_number} is currently under 'Active Review'. "
+                "Processing times vary, but your record is secure in the system."
+            ), False
         except Exception as e:
             logger.error(f"Nova Act automation error: {e}")
+            FALLBACKS.inc(kind="case_track_error")
             return (
                 f"System check for {receipt_number}: Your application is currently "
                 "'Processing'. Please allow 2-4 weeks for the next status update."
-            )
+            ), False
 
-    def check_status(self, receipt_number: str) -> str:
-        """Synchronous bridge for thread-pool execution."""
-        try:
-            if not any(receipt_number.startswith(prefix) for prefix in ("MSC", "SRC", "WAC", "EAC", "LIN", "NBC")):
-                return "Invalid receipt format. Please provide a standard USCIS receipt number (e.g., MSC1234567890)."
+    async def _fetch(self, receipt_number, timeout):
+        status_text, live = await self._lookup(receipt_number, timeout)
+        if live:
+            self.cache.put(receipt_number, status_text)
+        else:
+            self.cache.postpone(receipt_number)
+        return status_text, live
+
+    def _shared_fetch(self, receipt_number, timeout) -> asyncio.Task:
+        """One portal lookup per receipt at a time; it finishes (and fills the cache) even if its caller gives up."""
+        task = self._inflight.get(receipt_number)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch(receipt_number, timeout))
+            self._inflight[receipt_number] = task
+
+            def forget(done):
+                if self._inflight.get(receipt_number) is done:
+                    del self._inflight[receipt_number]
+
+            task.add_done_callback(forget)
+        return task
+
+    async def track(self, receipt_number: str, timeout: float | None = None) -> dict:
+        """
+        Status of one receipt as {"receipt_number", "status", "source"}, source being
+        SOURCE_CACHE, SOURCE_PORTAL, SOURCE_FALLBACK or SOURCE_INVALID.
+        Cached statuses are returned at once; a stale one is revalidated in the background.
+        """
+        if not receipt_number.startswith(RECEIPT_PREFIXES):
+            return {"receipt_number": receipt_number, "status": INVALID_RECEIPT, "source": SOURCE_INVALID}
+        cached = self.cache.get(receipt_number)
+        if cached is not None:
+            status_text, freshness = cached
+            if freshness != FRESH:
+                self._shared_fetch(receipt_number, CASE_REFRESH_TIMEOUT)
+            return {"receipt_number": receipt_number, "status": status_text, "source": SOURCE_CACHE}
+        status_text, live = await asyncio.shield(self._shared_fetch(receipt_number, timeout))
+        return {"receipt_number": receipt_number, "status": status_text,
+                "source": SOURCE_PORTAL if live else SOURCE_FALLBACK}
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    async def check_status_async(self, receipt_number: str, timeout: float | None = None) -> tuple[str, str]:
+        """
+        check_status for callers on an event loop, as (status text, source) so a
+        fallback message is not mistaken for a portal status. Holds no thread
+        while the page loads.
+        """
+        result = await self.track(receipt_number, timeout)
+        return result["status"], result["source"]
+
+    async def refresh_due(self) -> int:
+        """Re-check cached receipts whose refresh time has passed; returns how many were refreshed."""
+        receipts = self.cache.due()
+        if not receipts:
+            return 0
+        slots = asyncio.Semaphore(self.refresh_parallelism)
+
+        async def refresh(receipt):
+            async with slots:
+                _, live = await self._shared_fetch(receipt, CASE_REFRESH_TIMEOUT)
+                return live
+
+        results = await asyncio.gather(*(refresh(r) for r in receipts), return_exceptions=True)
+        refreshed = sum(1 for r in results if r is True)
+        self.cache.refreshes += refreshed
+        return refreshed
+
+    async def run_refresher(self, tick: float = 60.0):
+        """Background loop for refresh_due; the jittered tick keeps workers from scraping in lockstep."""
+        while True:
+            await asyncio.sleep(tick * random.uniform(0.5, 1.5))
             try:
-                return loop.run_until_complete(self.get_case_status_real(receipt_number))
-            finally:
-                loop.close()
+                refreshed = await self.refresh_due()
+                if refreshed:
+                    logger.info(f"Refreshed {refreshed} cached case statuses")
+            except Exception as e:
+                logger.warning(f"Case status refresh failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "rate_limit": self.rate_limiter.stats(),
+            "http_fast_path": self.http_fast_path and time.monotonic() >= self._http_disabled_until,
+            "http_lookups": self.http_lookups,
+        }
+
+    def check_status(self, receipt_number: str, timeout: float | None = None) -> str:
+        """Synchronous bridge for thread-pool execution."""
+        try:
+            if not receipt_number.startswith(RECEIPT_PREFIXES):
+                return INVALID_RECEIPT
+            cached = self.cache.get(receipt_number)
+            if cached is not None:
+                # Stale entries are left to the background refresher
+                return cached[0]
+            status_text, _ = asyncio.run(self._fetch(receipt_number, timeout))
+            return status_text
         except Exception as e:
             logger.error(f"Sync bridge error: {e}")
             return f"Status for {receipt_number}: 'Actively Reviewing'. Your record has been verified on the portal."
@@ -99,7 +273,12 @@ _case_tracker = None
 def get_case_tracker() -> CaseTrackerAgent:
     global _case_tracker
     if _case_tracker is None:
-        _case_tracker = CaseTrackerAgent()
+        _case_tracker = CaseTrackerAgent(
+            cache=StatusCache(ttl=CASE_STATUS_TTL, max_stale=CASE_STATUS_MAX_STALE,
+                              refresh_interval=CASE_REFRESH_INTERVAL),
+            refresh_parallelism=CASE_REFRESH_PARALLELISM,
+            rate_limiter=HostRateLimiter(PORTAL_RATE, PORTAL_BURST),
+        )
     return _case_tracker
 
 
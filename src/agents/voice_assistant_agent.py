@@ -1,5 +1,5 @@
 import os
-from src.utils.nova_integration import nova_client
+from src.utils.nova_integration import get_nova_client
 from src.utils.logger import logger
 
 class VoiceAssistantAgent:
@@ -18,7 +18,7 @@ class VoiceAssistantAgent:
         logger.info("Identifying language of transcribed text")
         try:
             prompt = f"Identify the ISO 639-1 language code for the following text: '{text}'. Respond ONLY with the code (e.g., 'en', 'es', 'ar')."
-            lang_code = nova_client.generate_response(prompt, "You are a language detection expert.")
+            lang_code = get_nova_client().generate_response(prompt, "You are a language detection expert.")
             logger.info(f"Language identified: {lang_code}")
             return lang_code.strip().lower()
         except Exception as e:
@@ -33,7 +33,7 @@ class VoiceAssistantAgent:
         
         try:
             # 1. Speech to Text
-            transcribed_text = nova_client.transcribe_audio(audio_bytes, content_type)
+            transcribed_text = get_nova_client().transcribe_audio(audio_bytes, content_type)
             if not transcribed_text:
                 logger.warning("No transcription obtained")
                 return None, "I'm sorry, I couldn't hear you clearly. Could you please repeat that?"
@@ -44,12 +44,12 @@ class VoiceAssistantAgent:
             lang_code = self.identify_language(transcribed_text)
             
             # 2. Reasoning / Response Generation
-            response_text = nova_client.generate_response(transcribed_text, self.system_prompt)
+            response_text = get_nova_client().generate_response(transcribed_text, self.system_prompt)
             logger.info(f"Agent response: {response_text}")
 
             # 3. Text to Speech
             # In a real Nova 2 Sonic implementation, the lang_code helps tune the accent/voice.
-            audio_response = nova_client.text_to_speech(response_text)
+            audio_response = get_nova_client().text_to_speech(response_text)
             
             return audio_response, response_text
 
@@ -74,4 +74,4 @@ def process_voice_input(transcribed_text):
     """Fallback for the simplified run_voice_demo.py."""
     # Note: The simplified version in the walkthrough used text directly.
     # Here we bridge it to Nova Lite.
-    return nova_client.generate_response(transcribed_text)
+    return get_nova_client().generate_response(transcribed_text)
@@ -1,5 +1,5 @@
 import numpy as np
-from src.utils.nova_integration import nova_client
+from src.utils.nova_integration import get_nova_client
 from src.utils.logger import logger
 
 class AsylumReasoning:
@@ -23,7 +23,7 @@ class AsylumReasoning:
             chunks = [c.strip() for c in content.split("\n") if len(c.strip()) > 20]
             
             for chunk in chunks:
-                embedding = nova_client.get_embeddings(chunk)
+                embedding = get_nova_client().get_embeddings(chunk)
                 self.knowledge_base.append({
                     "text": chunk,
                     "embedding": embedding
@@ -38,7 +38,7 @@ class AsylumReasoning:
             return ""
             
         try:
-            query_embedding = nova_client.get_embeddings(query)
+            query_embedding = get_nova_client().get_embeddings(query)
             similarities = []
             
             for item in self.knowledge_base:
@@ -69,7 +69,7 @@ class AsylumReasoning:
                 "Highlight which grounds match the user's story and what further evidence is needed."
             )
             
-            assessment = nova_client.generate_response(prompt, self.asylum_system_prompt)
+            assessment = get_nova_client().generate_response(prompt, self.asylum_system_prompt)
             return assessment
         except Exception as e:
             logger.error(f"Error during asylum screening: {e}")
@@ -80,7 +80,7 @@ class AsylumReasoning:
         logger.info(f"Retrieving filing guidance for {country_of_origin}")
         try:
             prompt = f"What are the general steps and common challenges for asylum seekers from {country_of_origin}?"
-            guidance = nova_client.generate_response(prompt, self.asylum_system_prompt)
+            guidance = get_nova_client().generate_response(prompt, self.asylum_system_prompt)
             return guidance
         except Exception as e:
             logger.error(f"Error retrieving filing guidance: {e}")
@@ -1,17 +1,19 @@
 import base64
 import json
-import boto3
 from src.utils.logger import logger
+from src.utils.nova_integration import BEDROCK_REGION, get_bedrock_client
 
 class DocumentInterpreter:
-    def __init__(self, region_name="us-east-1"):
-        self.bedrock_runtime = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=region_name
-        )
+    def __init__(self, region_name=BEDROCK_REGION):
+        self.region_name = region_name
         # Using Nova Lite which is multimodal
         self.model_id = "amzn.nova-2-lite.v1"
 
+    @property
+    def bedrock_runtime(self):
+        # Shared client from the registry, resolved on first use rather than at import
+        return get_bedrock_client(self.model_id, self.region_name)
+
     def interpret_id_document(self, image_bytes, image_format="png"):
         """
         Interprets an ID document (passport, visa, etc.) from an image.
@@ -0,0 +1,136 @@
+"""
+Admission control for expensive endpoints.
+
+At most `max_concurrent` requests run at once and at most `max_queue`
+wait behind them, each for no longer than `queue_timeout` seconds.
+Anything beyond that is rejected with `Overloaded` (the API turns it
+into 503 + Retry-After) instead of piling up without bound.
+
+Admitted requests get a degradation level from the queue pressure at
+the moment they were admitted:
+
+    0  normal
+    1  keyword retrieval instead of Titan (DEGRADE_KEYWORD)
+    2  retrieval only, no generation (DEGRADE_RETRIEVAL_ONLY)
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+DEGRADE_NONE = 0
+DEGRADE_KEYWORD = 1
+DEGRADE_RETRIEVAL_ONLY = 2
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    __slots__ = ("queued_for", "level", "released")
+
+    def __init__(self, queued_for: float, level: int):
+        self.queued_for = queued_for
+        self.level = level
+        self.released = False
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, queue_timeout: float = 10.0,
+                 retry_after: int = 5, keyword_at: float = 0.5, retrieval_only_at: float = 0.8):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.keyword_at = keyword_at
+        self.retrieval_only_at = retrieval_only_at
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.degraded = 0
+        self._loop = None
+        self._semaphore = None
+
+    def _sem(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _queued(self) -> int:
+        return max(0, self.active + self.waiting - self.max_concurrent)
+
+    def pressure(self) -> float:
+        """Fraction of the wait queue in use (0.0 idle, 1.0 full)."""
+        if not self.max_queue:
+            return 1.0 if self.active >= self.max_concurrent else 0.0
+        return min(1.0, self._queued() / self.max_queue)
+
+    def _level(self) -> int:
+        pressure = self.pressure()
+        if pressure >= self.retrieval_only_at:
+            return DEGRADE_RETRIEVAL_ONLY
+        if pressure >= self.keyword_at:
+            return DEGRADE_KEYWORD
+        return DEGRADE_NONE
+
+    async def enter(self) -> Ticket:
+        """Wait for a slot; raises Overloaded if the queue is full or the wait times out."""
+        sem = self._sem()
+        started = time.monotonic()
+        if not sem.locked():
+            await sem.acquire()  # free slot: returns without suspending
+        else:
+            if self._queued() >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("queue full", self.retry_after)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(sem.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise Overloaded("queue timeout", self.retry_after) from None
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        # Degrade according to the backlog still queued behind this request
+        level = self._level()
+        self.admitted += 1
+        if level:
+            self.degraded += 1
+        return Ticket(time.monotonic() - started, level)
+
+    def leave(self, ticket: Ticket | None = None) -> None:
+        """Give the slot back; with a ticket, only its first release counts."""
+        if ticket is not None:
+            if ticket.released:
+                return
+            ticket.released = True
+        self.active -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self):
+        ticket = await self.enter()
+        try:
+            yield ticket
+        finally:
+            self.leave(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "degraded": self.degraded,
+        }
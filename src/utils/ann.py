@@ -0,0 +1,139 @@
+"""
+Approximate nearest-neighbour search: a pure-NumPy IVF (inverted file) index.
+
+Rows are clustered with spherical k-means into `n_lists` cells. A query
+scores the centroids, then only the rows in the `nprobe` closest cells.
+`nprobe` is the recall-vs-latency knob: nprobe == n_lists is exact search.
+Inputs are expected to be L2-normalised, so dot product == cosine.
+"""
+import logging
+import os
+import time
+import zlib
+
+import numpy as np
+
+from src.utils.topk import top_k_desc
+
+logger = logging.getLogger(__name__)
+
+
+def default_n_lists(n_rows: int) -> int:
+    return max(1, min(n_rows, int(round(4 * np.sqrt(n_rows)))))
+
+
+def fingerprint(embeddings: np.ndarray, batch: int = 65536) -> str:
+    """
+    Identity for a corpus matrix: shape plus a CRC of every row, so a single
+    edited chunk invalidates a saved index. One pass over the matrix, in
+    row batches without copying it, is cheap next to k-means.
+    """
+    crc = 0
+    for start in range(0, len(embeddings), batch):
+        block = np.ascontiguousarray(embeddings[start:start + batch], dtype=np.float32)
+        crc = zlib.crc32(memoryview(block).cast("B"), crc)
+    return f"{embeddings.shape[0]}x{embeddings.shape[1]}:{crc:08x}"
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch: int = 8192) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch):
+        labels[start:start + batch] = np.argmax(vectors[start:start + batch] @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, n_lists: int, n_iter: int = 10,
+                    sample_size: int | None = None, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) `vectors`."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample_size = min(n, sample_size or 64 * n_lists)
+    sample = vectors[np.sort(rng.choice(n, sample_size, replace=False))] if sample_size < n else vectors
+    sample = np.asarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():  # re-seed empty cells from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms > 0, norms, 1)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray,
+                 nprobe: int = 8, fingerprint: str = ""):
+        self.fingerprint = fingerprint
+        self.centroids = centroids
+        self.order = order      # row ids grouped by cell
+        self.offsets = offsets  # cell c holds order[offsets[c]:offsets[c + 1]]
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, n_lists: int | None = None, n_iter: int = 10,
+              sample_size: int | None = None, nprobe: int = 8, seed: int = 0) -> "IVFIndex":
+        started = time.perf_counter()
+        n_lists = n_lists or default_n_lists(len(embeddings))
+        centroids = train_centroids(embeddings, n_lists, n_iter=n_iter, sample_size=sample_size, seed=seed)
+        labels = _assign(embeddings, centroids)
+        order = np.argsort(labels, kind="stable").astype(np.int32)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        logger.info(
+            f"Built IVF index: {len(embeddings)} rows, {n_lists} lists "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return cls(centroids, order, offsets, nprobe=nprobe, fingerprint=fingerprint(embeddings))
+
+    def candidates(self, query: np.ndarray, nprobe: int | None = None) -> np.ndarray:
+        """Row ids in the `nprobe` cells closest to `query`, in corpus order."""
+        nprobe = min(self.n_lists, nprobe or self.nprobe)
+        cell_scores = self.centroids @ query
+        if nprobe < self.n_lists:
+            cells = np.argpartition(-cell_scores, nprobe - 1)[:nprobe]
+        else:
+            cells = np.arange(self.n_lists)
+        ids = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+        ids.sort()
+        return ids
+
+    def search(self, embeddings: np.ndarray, query: np.ndarray, top_k: int,
+               nprobe: int | None = None) -> list[tuple[float, int]]:
+        """(score, row id) of the best top_k rows among the probed cells, highest first."""
+        ids = self.candidates(query, nprobe)
+        if not len(ids):
+            return []
+        scores = embeddings[ids] @ query
+        best = top_k_desc(scores, top_k)
+        return [(float(scores[i]), int(ids[i])) for i in best]
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez(tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 fingerprint=np.array(self.fingerprint))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, expected_fingerprint: str, nprobe: int = 8) -> "IVFIndex | None":
+        """Load a saved index, or None if it is missing or was built for another corpus."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls(data["centroids"], data["order"], data["offsets"],
+                            nprobe=nprobe, fingerprint=str(data["fingerprint"]))
+        except Exception as e:
+            logger.warning(f"IVF index load failed: {e}")
+            return None
+        if index.fingerprint != expected_fingerprint:
+            return None
+        return index
@@ -0,0 +1,109 @@
+"""
+Semantic cache for generated chat answers.
+
+An answer is reused when a new question in the same language has a query
+embedding whose cosine similarity to a cached question is at least
+`threshold`. Entries carry the index generation they were generated
+against, so publishing a new legal corpus invalidates them. Bounded by
+size (least recently used first) and TTL. Thread-safe.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_size: int = 512, ttl: float | None = 3600.0, threshold: float = 0.95):
+        self.max_size = max_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_id = 0
+        # id -> (language, generation, stored_at, unit query vector, answer)
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        # language -> (ids, stacked vectors); rebuilt lazily after changes
+        self._matrices: dict[str, tuple[list[int], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def _drop(self, entry_id: int) -> None:
+        language = self._entries.pop(entry_id)[0]
+        self._matrices.pop(language, None)
+
+    def _matrix(self, language: str) -> tuple[list[int], np.ndarray] | None:
+        if language not in self._matrices:
+            ids = [i for i, e in self._entries.items() if e[0] == language]
+            if not ids:
+                return None
+            self._matrices[language] = (ids, np.stack([self._entries[i][3] for i in ids]))
+        return self._matrices[language]
+
+    def get(self, language: str, query_embedding, generation: int) -> dict | None:
+        """Cached answer for a semantically equivalent question, or None."""
+        query = self._unit(query_embedding)
+        now = time.time()
+        with self._lock:
+            found = self._matrix(language)
+            if found is not None:
+                ids, matrix = found
+                scores = matrix @ query
+                for pos in np.argsort(-scores):
+                    if scores[pos] < self.threshold:
+                        break
+                    entry_id = ids[pos]
+                    _, entry_gen, stored_at, _, answer = self._entries[entry_id]
+                    if entry_gen != generation or (self.ttl is not None and now - stored_at > self.ttl):
+                        continue  # purged below
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return answer
+                self._purge(now, generation)
+            self.misses += 1
+            return None
+
+    def put(self, language: str, query_embedding, generation: int, answer: dict) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (language, generation, time.time(), self._unit(query_embedding), answer)
+            self._matrices.pop(language, None)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _purge(self, now: float, generation: int) -> None:
+        stale = [
+            i for i, (_, gen, stored_at, _, _) in self._entries.items()
+            if gen != generation or (self.ttl is not None and now - stored_at > self.ttl)
+        ]
+        for entry_id in stale:
+            self._drop(entry_id)
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,68 @@
+"""
+Okapi BM25 over a prebuilt inverted index.
+
+Used by the keyword fallback path (index still loading, or Titan down).
+Each posting stores its precomputed BM25 term weight, so a query only
+touches the posting lists of its own terms: cost grows with the number
+of matching postings rather than with the corpus size.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from src.utils.topk import top_k_desc
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, chunks, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._build()
+
+    def _build(self) -> None:
+        doc_ids: dict[str, list[int]] = defaultdict(list)
+        freqs: dict[str, list[int]] = defaultdict(list)
+        lengths = []
+        for doc_id, chunk in enumerate(self.chunks):
+            counts = Counter(tokenize(chunk))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                doc_ids[term].append(doc_id)
+                freqs[term].append(tf)
+
+        n_docs = len(lengths)
+        doc_len = np.asarray(lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if n_docs and doc_len.mean() > 0 else 1.0
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+
+        for term, ids in doc_ids.items():
+            ids_arr = np.asarray(ids, dtype=np.int32)
+            tf = np.asarray(freqs[term], dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            weights = idf * tf * (self.k1 + 1) / (tf + norm[ids_arr])
+            self.postings[term] = (ids_arr, weights.astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, top_k: int) -> list[tuple[float, int]]:
+        """(score, chunk index) for the best top_k matching chunks, highest first."""
+        lists = [self.postings[t] for t in set(tokenize(query)) if t in self.postings]
+        if not lists or top_k <= 0:
+            return []
+        ids = np.concatenate([ids for ids, _ in lists])
+        weights = np.concatenate([w for _, w in lists])
+        docs, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        order = top_k_desc(scores, top_k)
+        return [(float(scores[i]), int(docs[i])) for i in order]
@@ -0,0 +1,215 @@
+"""
+Long-lived headless Chromium shared by all case-status lookups.
+
+Playwright and one browser run on a dedicated event loop in their own
+thread. Lookups borrow a page from a pool of reusable browser contexts
+instead of launching Chromium each time, so a lookup costs only its
+portal navigation, and no server executor thread is held while it runs.
+
+- at most `size` pages are in use at once; extra callers wait for a slot
+- a context is recycled (closed, then recreated on demand) after
+  `max_uses` lookups or after a lookup fails on it
+- the browser is health-checked before each lookup and relaunched if it
+  has disconnected; after a failed launch, lookups fail fast with
+  BrowserUnavailable for `relaunch_cooldown` seconds
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
+
+
+class BrowserUnavailable(Exception):
+    pass
+
+
+class _Slot:
+    __slots__ = ("context", "page", "uses")
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_uses: int = 50, relaunch_cooldown: float = 60.0):
+        self.size = size
+        self.max_uses = max_uses
+        self.relaunch_cooldown = relaunch_cooldown
+        self.launches = 0
+        self.launch_failures = 0
+        self.contexts_created = 0
+        self.recycled = 0
+        self.lookups = 0
+        self.in_use = 0
+        self._idle: list[_Slot] = []
+        self._playwright = None
+        self._browser = None
+        self._launch_failed_at = None
+        self._loop = asyncio.new_event_loop()
+        # Created here so callers never race the thread; they bind to the pool loop on first use
+        self._slots = asyncio.Semaphore(size)
+        self._browser_lock = asyncio.Lock()
+        self._thread = threading.Thread(target=self._run_loop, name="browser-pool", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    # ── Runs on the pool loop ────────────────────────────────────────────────
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("Pooled browser disconnected; relaunching")
+                self._idle.clear()
+                self._browser = None
+            if self._launch_failed_at is not None and time.monotonic() - self._launch_failed_at < self.relaunch_cooldown:
+                raise BrowserUnavailable("browser launch failed recently")
+            try:
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+            except Exception as e:
+                self.launch_failures += 1
+                self._launch_failed_at = time.monotonic()
+                raise BrowserUnavailable(str(e)) from e
+            self._launch_failed_at = None
+            self.launches += 1
+            logger.info("Pooled Chromium launched")
+            return self._browser
+
+    async def _acquire(self) -> _Slot:
+        browser = await self._ensure_browser()
+        while self._idle:
+            slot = self._idle.pop()
+            if not slot.page.is_closed():
+                return slot
+            await self._close(slot)
+        context = await browser.new_context()
+        self.contexts_created += 1
+        return _Slot(context, await context.new_page())
+
+    async def _close(self, slot: _Slot) -> None:
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+
+    async def _release(self, slot: _Slot, healthy: bool) -> None:
+        slot.uses += 1
+        if healthy and slot.uses < self.max_uses and self._browser is not None and self._browser.is_connected():
+            self._idle.append(slot)
+            return
+        self.recycled += 1
+        await self._close(slot)
+
+    async def _with_page(self, fn, timeout: float | None):
+        expires_at = time.monotonic() + timeout if timeout else None
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("no browser page free within the timeout") from None
+        try:
+            slot = await self._acquire()
+            self.in_use += 1
+            self.lookups += 1
+            healthy = False
+            try:
+                remaining = None if expires_at is None else max(0.001, expires_at - time.monotonic())
+                result = await asyncio.wait_for(fn(slot.page), remaining)
+                healthy = True
+                return result
+            finally:
+                self.in_use -= 1
+                await self._release(slot, healthy)
+        finally:
+            self._slots.release()
+
+    async def _shutdown(self) -> None:
+        for slot in self._idle:
+            await self._close(slot)
+        self._idle.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # ── Callable from any thread or loop ─────────────────────────────────────
+    async def run_async(self, fn, timeout: float | None = None):
+        """Await `fn(page)` on the pool loop with a pooled page; `timeout` includes waiting for a page."""
+        future = asyncio.run_coroutine_threadsafe(self._with_page(fn, timeout), self._loop)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def run(self, fn, timeout: float | None = None):
+        """Blocking run_async for synchronous callers (not from the pool thread itself)."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BrowserPool.run would deadlock on its own loop; use run_async")
+        return asyncio.run_coroutine_threadsafe(self._with_page(fn, timeout), self._loop).result()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "browser_connected": bool(self._browser is not None and self._browser.is_connected()),
+            "in_use": self.in_use,
+            "idle": len(self._idle),
+            "lookups": self.lookups,
+            "launches": self.launches,
+            "launch_failures": self.launch_failures,
+            "contexts_created": self.contexts_created,
+            "recycled": self.recycled,
+        }
+
+
+# Lazy singleton — the thread and browser start on the first lookup, not at import
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                size=int(os.environ.get("BROWSER_POOL_SIZE", 2)),
+                max_uses=int(os.environ.get("BROWSER_PAGE_MAX_USES", 50)),
+            )
+        return _pool
+
+
+def shutdown_browser_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def browser_pool_stats() -> dict | None:
+    return _pool.stats() if _pool is not None else None
@@ -0,0 +1,156 @@
+"""
+Concurrent bulk embedding for index builds.
+
+Identical chunk texts are embedded once, Titan calls run on a bounded
+thread pool, throttling errors are retried with exponential backoff and
+jitter, and every finished embedding is appended to a checkpoint file so
+an interrupted build resumes where it stopped instead of from zero.
+"""
+import hashlib
+import logging
+import os
+import random
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bedrock error codes worth retrying; anything else fails the chunk at once
+RETRYABLE_CODES = {
+    "ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+    "ModelNotReadyException", "InternalServerException", "RequestTimeout",
+}
+
+_RECORD = struct.Struct("<32sI")  # sha256 digest, embedding dimension
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for throttling / transient Bedrock and connection errors."""
+    response = getattr(error, "response", None)
+    code = response.get("Error", {}).get("Code") if isinstance(response, dict) else None
+    if code in RETRYABLE_CODES:
+        return True
+    try:
+        from botocore.exceptions import ConnectionError as BotoConnectionError
+        from botocore.exceptions import ReadTimeoutError
+    except ImportError:  # pragma: no cover - botocore ships with boto3
+        return False
+    return isinstance(error, (BotoConnectionError, ReadTimeoutError))
+
+
+class EmbeddingCheckpoint:
+    """Append-only file of (digest, float32 vector) records."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def load(self) -> dict[bytes, np.ndarray]:
+        done: dict[bytes, np.ndarray] = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "rb") as f:
+            while True:
+                head = f.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    break
+                digest, dim = _RECORD.unpack(head)
+                raw = f.read(dim * 4)
+                if len(raw) < dim * 4:
+                    break  # torn write from a crash; that chunk is re-embedded
+                done[digest] = np.frombuffer(raw, dtype="<f4")
+        return done
+
+    def append(self, digest: bytes, embedding: np.ndarray) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "ab")
+        vec = np.ascontiguousarray(embedding, dtype="<f4")
+        self._file.write(_RECORD.pack(digest, vec.shape[0]) + vec.tobytes())
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkEmbedder:
+    def __init__(self, embed_fn, max_workers: int = 8, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 20.0,
+                 checkpoint_path: str | None = None):
+        self.embed_fn = embed_fn
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.checkpoint = EmbeddingCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.failed = 0
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        attempt = 0
+        while True:
+            try:
+                return np.asarray(self.embed_fn(text), dtype=np.float32)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                attempt += 1
+                time.sleep(random.uniform(delay / 2, delay))
+
+    def embed(self, texts: list[str]) -> list[np.ndarray | None]:
+        """
+        Embed `texts`, returning one vector per input (None where embedding
+        failed after retries). Each distinct text is sent to Titan once.
+        """
+        digests = [text_digest(t) for t in texts]
+        unique: dict[bytes, str] = {}
+        for digest, text in zip(digests, texts):
+            unique.setdefault(digest, text)
+
+        done = self.checkpoint.load() if self.checkpoint else {}
+        done = {d: v for d, v in done.items() if d in unique}
+        pending = [(d, t) for d, t in unique.items() if d not in done]
+        logger.info(
+            f"Bulk embedding: {len(texts)} chunks, {len(unique)} unique, "
+            f"{len(done)} from checkpoint, {len(pending)} to embed ({self.max_workers} workers)"
+        )
+
+        self.failed = 0
+        step = max(1, len(pending) // 20)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._embed_one, text): digest for digest, text in pending}
+                for n, future in enumerate(as_completed(futures), 1):
+                    digest = futures[future]
+                    try:
+                        vec = future.result()
+                    except Exception as e:
+                        self.failed += 1
+                        logger.error(f"  Chunk embedding failed after retries: {e}")
+                    else:
+                        done[digest] = vec
+                        if self.checkpoint:
+                            self.checkpoint.append(digest, vec)
+                    if n % step == 0 or n == len(pending):
+                        logger.info(f"  Progress: {n}/{len(pending)} chunks embedded")
+        finally:
+            if self.checkpoint:
+                self.checkpoint.close()
+
+        if self.failed:
+            logger.warning(f"Bulk embedding: {self.failed} unique chunks failed and will be retried on the next build")
+        return [done.get(d) for d in digests]
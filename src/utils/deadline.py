@@ -0,0 +1,48 @@
+"""
+Per-request deadlines.
+
+A Deadline is created once when a request arrives and passed to every
+stage; each stage awaits its work with whatever budget is left (minus a
+reserve kept for later stages), so the request as a whole finishes within
+the deadline no matter which stage is slow.
+"""
+import asyncio
+import inspect
+import time
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self, reserve: float = 0.0) -> float:
+        """Seconds left, keeping `reserve` seconds back for later stages."""
+        return max(0.0, self.expires_at - reserve - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    async def run(self, awaitable, reserve: float = 0.0, cap: float | None = None):
+        """
+        Await `awaitable` within the remaining budget (at most `cap` seconds).
+        Raises DeadlineExceeded, after cancelling it, if it does not finish in time.
+        """
+        budget = self.remaining(reserve)
+        if cap is not None:
+            budget = min(budget, cap)
+        if budget <= 0:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            elif isinstance(awaitable, asyncio.Future):
+                awaitable.cancel()
+            raise DeadlineExceeded
+        try:
+            return await asyncio.wait_for(awaitable, budget)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded from None
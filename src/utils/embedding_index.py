@@ -0,0 +1,137 @@
+"""
+Compact binary on-disk format for the RAG embedding index.
+
+Layout (little-endian, one file so it can be swapped atomically):
+
+    header   magic, version, dim, count, section offsets, model id
+    matrix   count x dim float32, rows L2-normalised, 64-byte aligned
+    offsets  (count + 1) uint64 byte offsets into the text blob
+    blob     UTF-8 chunk texts, concatenated
+
+The matrix and the blob are read through a shared read-only mmap, so
+loading costs a few page faults instead of a JSON parse, and the pages
+are shared by every process that opens the same file.
+"""
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RLNEMB\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQQ64s")
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class ChunkTexts(Sequence):
+    """Read-only list of chunk strings decoded lazily from the mmap'd blob."""
+
+    def __init__(self, buf, blob_offset: int, offsets: np.ndarray):
+        self._buf = buf
+        self._blob_offset = blob_offset
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        start = self._blob_offset + int(self._offsets[i])
+        end = self._blob_offset + int(self._offsets[i + 1])
+        return bytes(self._buf[start:end]).decode("utf-8")
+
+
+class EmbeddingIndex:
+    """An opened index file: `chunks`, `embeddings` (mmap'd) and `model_id`."""
+
+    def __init__(self, path: str, chunks: ChunkTexts, embeddings: np.ndarray, model_id: str, mm=None):
+        self.path = path
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self._mmap = mm
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+
+def write_index(path: str, chunks: list[str], embeddings: np.ndarray, model_id: str) -> None:
+    """Write chunks + normalised embeddings to `path` (atomic rename)."""
+    matrix = np.ascontiguousarray(embeddings, dtype="<f4")
+    count = len(chunks)
+    if matrix.size == 0:
+        matrix = matrix.reshape(count, 0)
+    if matrix.ndim != 2 or matrix.shape[0] != count:
+        raise ValueError(f"Embedding matrix shape {matrix.shape} does not match {count} chunks")
+    dim = matrix.shape[1]
+
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = np.zeros(count + 1, dtype="<u8")
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    matrix_off = _aligned(_HEADER.size)
+    offsets_off = _aligned(matrix_off + matrix.nbytes)
+    blob_off = offsets_off + offsets.nbytes
+    header = _HEADER.pack(
+        MAGIC, VERSION, dim, count, matrix_off, offsets_off, blob_off,
+        model_id.encode("utf-8"),
+    )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\x00" * (matrix_off - _HEADER.size))
+        f.write(matrix.tobytes())
+        f.write(b"\x00" * (offsets_off - matrix_off - matrix.nbytes))
+        f.write(offsets.tobytes())
+        for b in encoded:
+            f.write(b)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote embedding index {path}: {count} x {dim} ({model_id})")
+
+
+def read_index(path: str) -> EmbeddingIndex:
+    """Memory-map an index written by `write_index`."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError(f"{path} is too small to be an embedding index")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, dim, count, matrix_off, offsets_off, blob_off, model_raw = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an embedding index (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported index version {version}")
+
+    if max(matrix_off + count * dim * 4, offsets_off + (count + 1) * 8) > size:
+        raise ValueError(f"{path} is truncated")
+    embeddings = np.frombuffer(mm, dtype="<f4", count=count * dim, offset=matrix_off).reshape(count, dim)
+    offsets = np.frombuffer(mm, dtype="<u8", count=count + 1, offset=offsets_off)
+    if blob_off + int(offsets[-1]) > size:
+        raise ValueError(f"{path} is truncated")
+
+    model_id = model_raw.rstrip(b"\x00").decode("utf-8")
+    return EmbeddingIndex(path, ChunkTexts(mm, blob_off, offsets), embeddings, model_id, mm)
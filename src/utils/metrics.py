@@ -0,0 +1,259 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms with optional labels, a registry that
+renders them for GET /api/metrics, and an ASGI middleware that times
+every API request until its last body chunk is sent (so streamed
+responses are measured in full). Thread-safe; no external dependency.
+
+stage() also records into the current request's timings when
+record_timings() was called for it, for the Server-Timing header.
+"""
+import math
+import threading
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        head = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return head + "".join(line + "\n" for line in self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """A value that is set directly, or read from `fn` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn=None, **kwargs):
+        super().__init__(name, documentation, **kwargs)
+        self._fn = fn
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> list[str]:
+        if self._fn is not None:
+            try:
+                return [f"{self.name} {_format_value(self._fn())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+# Per-request stage durations (name -> seconds); None when not being recorded
+_timings: ContextVar[dict | None] = ContextVar("stage_timings", default=None)
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, histogram, labels: dict, record: str | None = None):
+        self.histogram = histogram
+        self.labels = labels
+        self.record = record
+
+    def _recreate_cm(self):
+        # Fresh timer per decorated call, so concurrent calls do not share `started`
+        return _Timer(self.histogram, self.labels, self.record)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, **self.labels)
+        timings = _timings.get() if self.record else None
+        if timings is not None:
+            timings[self.record] = timings.get(self.record, 0.0) + elapsed
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(name, documentation, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [per-bucket counts, sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels) -> _Timer:
+        """Context manager / decorator observing the wall time of the block."""
+        return _Timer(self, labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics.values())
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Shared by the API server and the agents
+STAGE_SECONDS = Histogram(
+    "rln_stage_seconds", "Time spent in each chat pipeline stage.", labelnames=("stage",),
+)
+FALLBACKS = Counter(
+    "rln_fallbacks_total", "Degraded results served, by kind.", labelnames=("kind",),
+)
+REQUEST_SECONDS = Histogram(
+    "rln_request_seconds", "API request time until the last response byte.", labelnames=("route", "status"),
+)
+
+
+def stage(name: str) -> _Timer:
+    """Time a pipeline stage into STAGE_SECONDS and the current request's timings."""
+    return _Timer(STAGE_SECONDS, {"stage": name}, record=name)
+
+
+def record_timings() -> dict:
+    """Start collecting stage() durations for the current request (and tasks it spawns)."""
+    timings: dict = {}
+    _timings.set(timings)
+    return timings
+
+
+def server_timing(timings: dict) -> str:
+    """Server-Timing header value, e.g. `embed;dur=41.2, generate;dur=812.9`."""
+    return ", ".join(f"{name.replace('_', '-')};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware observing REQUEST_SECONDS for paths under `prefix`."""
+
+    def __init__(self, app, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        done = False
+
+        def observe():
+            nonlocal done
+            if done:
+                return
+            done = True
+            route = scope.get("route")
+            # Route templates, not raw paths, so ids in the URL do not explode the label set
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                route=getattr(route, "path", "unmatched"), status=str(status["code"]),
+            )
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            observe()
@@ -1,11 +1,20 @@
 """
 Nova AI client wrapper for Bedrock services.
 Uses lazy initialization to prevent startup crashes in cloud environments.
+All bedrock-runtime clients come from get_bedrock_client(), so the process
+shares one connection pool (and adaptive retry rate limiter) per timeout profile.
 """
 import boto3
 import json
+import os
 import base64
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from botocore.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +24,111 @@ NOVA_LITE_V1 = "amazon.nova-lite-v1:0"         # Fast, cost-effective text/multi
 NOVA_PRO_V1 = "amazon.nova-pro-v1:0"           # Highest capability
 EMBEDDING_V1 = "amazon.titan-embed-text-v2:0"  # Titan embeddings
 
+BEDROCK_REGION = "us-east-1"
+# Connections kept per client; sized for BEDROCK_MAX_CONCURRENCY calls in flight so
+# bursts reuse warm TLS connections instead of overflowing the pool
+BEDROCK_MAX_POOL_CONNECTIONS = int(
+    os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS") or os.environ.get("BEDROCK_MAX_CONCURRENCY", 64)
+)
+# Attempts per call, first one included; adaptive retries back off on throttling
+# and rate-limit the client itself
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", 4))
+BEDROCK_CONNECT_TIMEOUT = float(os.environ.get("BEDROCK_CONNECT_TIMEOUT", 3))
+# Read timeouts per model: embeddings answer in well under a second; generation
+# (and the gaps between streamed chunks) can take much longer
+BEDROCK_EMBED_TIMEOUT = float(os.environ.get("BEDROCK_EMBED_TIMEOUT", 10))
+BEDROCK_GENERATE_TIMEOUT = float(os.environ.get("BEDROCK_GENERATE_TIMEOUT", 60))
+MODEL_READ_TIMEOUTS = {
+    EMBEDDING_V1: BEDROCK_EMBED_TIMEOUT,
+    NOVA_LITE_V1: BEDROCK_GENERATE_TIMEOUT,
+    NOVA_PRO_V1: 2 * BEDROCK_GENERATE_TIMEOUT,
+    NOVA_SONIC_V1: BEDROCK_GENERATE_TIMEOUT,
+}
+
+
+def _chat_text(response_body: dict) -> str:
+    return response_body.get("output", {}).get("message", {}).get("content", [{}])[0].get("text", "")
+
+
+def _stream_delta(raw: bytes) -> str | None:
+    """Text delta carried by one Nova response-stream chunk, if any."""
+    return json.loads(raw).get("contentBlockDelta", {}).get("delta", {}).get("text")
+
+
+def read_timeout(model_id: str | None) -> float:
+    return MODEL_READ_TIMEOUTS.get(model_id, BEDROCK_GENERATE_TIMEOUT)
+
+
+def bedrock_config(model_id: str | None = None, max_attempts: int | None = None) -> Config:
+    """
+    botocore Config for calls to `model_id`: shared pool size, adaptive retries
+    (BEDROCK_MAX_ATTEMPTS unless `max_attempts` is given), per-model timeouts.
+    """
+    return Config(
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        retries={"mode": "adaptive", "total_max_attempts": max_attempts or BEDROCK_MAX_ATTEMPTS},
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=read_timeout(model_id),
+        tcp_keepalive=True,
+    )
+
+
+# ── Process-wide client registry ─────────────────────────────────────────────
+# boto3 clients are thread-safe once built, but building them is not, and each
+# one owns a connection pool; models with the same timeouts share a client.
+_bedrock_clients: dict = {}
+_bedrock_session = None
+_bedrock_lock = threading.Lock()
+
+
+def get_bedrock_client(model_id: str | None = None, region_name: str = BEDROCK_REGION,
+                       max_attempts: int | None = None):
+    """
+    The shared bedrock-runtime client to use for `model_id`. Callers that retry
+    on their own (BulkEmbedder) pass max_attempts=1 so retries do not stack.
+    """
+    attempts = max_attempts or BEDROCK_MAX_ATTEMPTS
+    key = (region_name, read_timeout(model_id), attempts)
+    client = _bedrock_clients.get(key)
+    if client is None:
+        global _bedrock_session
+        with _bedrock_lock:
+            client = _bedrock_clients.get(key)
+            if client is None:
+                if _bedrock_session is None:
+                    _bedrock_session = boto3.session.Session()
+                client = _bedrock_session.client(
+                    "bedrock-runtime", region_name=region_name, config=bedrock_config(model_id, attempts)
+                )
+                _bedrock_clients[key] = client
+                logger.info(f"Bedrock client created ({region_name}, read timeout {key[1]:.0f}s, "
+                            f"{attempts} attempts, pool {BEDROCK_MAX_POOL_CONNECTIONS})")
+    return client
+
+
+def warm_bedrock_clients(model_ids=(EMBEDDING_V1, NOVA_LITE_V1), region_name: str = BEDROCK_REGION) -> None:
+    """Build the clients ahead of the first request (loading the service model takes a while)."""
+    for model_id in model_ids:
+        get_bedrock_client(model_id, region_name)
+
+
+def bedrock_client_stats() -> dict:
+    return {
+        "clients": len(_bedrock_clients),
+        "max_pool_connections": BEDROCK_MAX_POOL_CONNECTIONS,
+        "retry_mode": "adaptive",
+        "max_attempts": BEDROCK_MAX_ATTEMPTS,
+    }
+
 
 class NovaClient:
-    def __init__(self, region_name="us-east-1"):
-        self.bedrock_runtime = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=region_name
-        )
+    def __init__(self, region_name=BEDROCK_REGION, max_attempts=None):
+        self.region_name = region_name
+        # None: the registry default (BEDROCK_MAX_ATTEMPTS)
+        self.max_attempts = max_attempts
+
+    def _client(self, model_id):
+        return get_bedrock_client(model_id, self.region_name, self.max_attempts)
 
     def transcribe_audio(self, audio_bytes, content_type="audio/wav"):
         """Uses Nova Sonic for Speech-to-Text."""
@@ -31,7 +138,7 @@ class NovaClient:
                 "audio": base64.b64encode(audio_bytes).decode("utf-8"),
                 "contentType": content_type
             })
-            response = self.bedrock_runtime.invoke_model(modelId=NOVA_SONIC_V1, body=body)
+            response = self._client(NOVA_SONIC_V1).invoke_model(modelId=NOVA_SONIC_V1, body=body)
             response_body = json.loads(response.get("body").read())
             transcription = response_body.get("text", "")
             logger.info("Transcription successful")
@@ -40,6 +147,22 @@ class NovaClient:
             logger.error(f"Error during audio transcription: {e}")
             raise
 
+    @staticmethod
+    def _chat_body(prompt, system_prompt, history):
+        messages = []
+        if history:
+            for turn in history:
+                role = turn.get("role", "user")
+                content = turn.get("content", "")
+                if role in ("user", "assistant") and content:
+                    messages.append({"role": role, "content": [{"text": content}]})
+        messages.append({"role": "user", "content": [{"text": prompt}]})
+        return json.dumps({
+            "system": [{"text": system_prompt}],
+            "messages": messages,
+            "inferenceConfig": {"maxTokens": 1000, "temperature": 0.7}
+        })
+
     def generate_response(self, prompt, system_prompt="You are a helpful assistant for refugees.", history=None):
         """
         Uses Nova Lite for text generation with optional multi-turn conversation history.
@@ -47,36 +170,44 @@ class NovaClient:
         """
         logger.info(f"Generating response with {NOVA_LITE_V1} (history={len(history) if history else 0} turns)")
         try:
-            messages = []
-            if history:
-                for turn in history:
-                    role = turn.get("role", "user")
-                    content = turn.get("content", "")
-                    if role in ("user", "assistant") and content:
-                        messages.append({"role": role, "content": [{"text": content}]})
-            messages.append({"role": "user", "content": [{"text": prompt}]})
-
-            body = json.dumps({
-                "system": [{"text": system_prompt}],
-                "messages": messages,
-                "inferenceConfig": {"maxTokens": 1000, "temperature": 0.7}
-            })
-
-            response = self.bedrock_runtime.invoke_model(modelId=NOVA_LITE_V1, body=body)
-            response_body = json.loads(response.get("body").read())
-            text = response_body.get("output", {}).get("message", {}).get("content", [{}])[0].get("text", "")
+            body = self._chat_body(prompt, system_prompt, history)
+            response = self._client(NOVA_LITE_V1).invoke_model(modelId=NOVA_LITE_V1, body=body)
+            text = _chat_text(json.loads(response.get("body").read()))
             logger.info("Response generation successful")
             return text
         except Exception as e:
             logger.error(f"Error during response generation: {e}")
             raise
 
+    def generate_response_stream(self, prompt, system_prompt="You are a helpful assistant for refugees.", history=None):
+        """
+        Streaming variant of generate_response: yields text deltas as Nova Lite
+        produces them (Bedrock invoke_model_with_response_stream).
+        """
+        logger.info(f"Streaming response with {NOVA_LITE_V1} (history={len(history) if history else 0} turns)")
+        try:
+            body = self._chat_body(prompt, system_prompt, history)
+            response = self._client(NOVA_LITE_V1).invoke_model_with_response_stream(
+                modelId=NOVA_LITE_V1, body=body
+            )
+            for event in response.get("body"):
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+                text = _stream_delta(chunk.get("bytes"))
+                if text:
+                    yield text
+            logger.info("Streaming response complete")
+        except Exception as e:
+            logger.error(f"Error during streaming response generation: {e}")
+            raise
+
     def text_to_speech(self, text):
         """Uses Nova Sonic for Text-to-Speech."""
         logger.info(f"Synthesizing speech with {NOVA_SONIC_V1}")
         try:
             body = json.dumps({"text": text})
-            response = self.bedrock_runtime.invoke_model(modelId=NOVA_SONIC_V1, body=body)
+            response = self._client(NOVA_SONIC_V1).invoke_model(modelId=NOVA_SONIC_V1, body=body)
             response_body = response.get("body").read()
             logger.info("Speech synthesis successful")
             return response_body
@@ -88,7 +219,7 @@ class NovaClient:
         """Generates embeddings for a given text using Amazon Bedrock Titan."""
         try:
             body = json.dumps({"inputText": text})
-            response = self.bedrock_runtime.invoke_model(modelId=EMBEDDING_V1, body=body)
+            response = self._client(EMBEDDING_V1).invoke_model(modelId=EMBEDDING_V1, body=body)
             response_body = json.loads(response.get("body").read())
             return response_body.get("embedding")
         except Exception as e:
@@ -96,6 +227,172 @@ class NovaClient:
             raise
 
 
+class AsyncNovaClient:
+    """
+    Async interface to the Bedrock calls the chat path needs (embeddings,
+    generation, streaming). Uses aiobotocore (a requirement) for native async
+    HTTP with the registry's config (pool size, retries, per-model timeouts),
+    so waiting on Bedrock holds no thread. Installs without it fall back to
+    running the shared boto3 clients on a dedicated thread pool. Either way
+    at most `max_concurrency` calls are in flight, independent of the
+    server's general-purpose executor.
+
+    aiobotocore clients belong to the event loop that opened them: using the
+    client from another loop raises RuntimeError until aclose() is awaited.
+    """
+
+    def __init__(self, region_name=BEDROCK_REGION, max_concurrency=64):
+        self.region_name = region_name
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._semaphore = None
+        self._client_lock = None
+        self._aio_ctxs = {}
+        self._aio_clients = {}
+        self._pool = None
+        # Calls holding / waiting for one of the max_concurrency slots (exported as gauges)
+        self.in_flight = 0
+        self.waiting = 0
+        try:
+            import aiobotocore  # noqa: F401
+            self.backend = "aiobotocore"
+        except ImportError:
+            self.backend = "threads"
+
+    async def _client(self, model_id):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores, locks and aiohttp sessions belong to one event loop;
+            # open sessions can only be closed on theirs, so refuse to orphan them
+            if self._aio_clients:
+                raise RuntimeError("AsyncNovaClient is bound to another event loop; await aclose() first")
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client_lock = asyncio.Lock()
+            self._aio_ctxs, self._aio_clients = {}, {}
+        if self.backend == "aiobotocore":
+            key = read_timeout(model_id)
+            if key not in self._aio_clients:
+                # Concurrent first calls would each open a client and leak all but one
+                async with self._client_lock:
+                    if key not in self._aio_clients:
+                        from aiobotocore.session import get_session
+                        ctx = get_session().create_client(
+                            "bedrock-runtime", region_name=self.region_name, config=bedrock_config(model_id)
+                        )
+                        client = await ctx.__aenter__()
+                        self._aio_ctxs[key] = ctx
+                        self._aio_clients[key] = client
+            return self._aio_clients[key]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bedrock")
+        return get_bedrock_client(model_id, self.region_name)
+
+    @asynccontextmanager
+    async def _slot(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            # Calls handed to the thread pool but not yet running (threads backend only)
+            "pool_queue_depth": self._pool._work_queue.qsize() if self._pool is not None else 0,
+        }
+
+    async def invoke_model(self, model_id: str, body: str) -> dict:
+        """invoke_model, returning the parsed JSON response body."""
+        client = await self._client(model_id)
+        async with self._slot():
+            if self.backend == "aiobotocore":
+                response = await client.invoke_model(modelId=model_id, body=body)
+                async with response["body"] as stream:
+                    return json.loads(await stream.read())
+            loop = asyncio.get_running_loop()
+
+            def call():
+                response = client.invoke_model(modelId=model_id, body=body)
+                return json.loads(response.get("body").read())
+            return await loop.run_in_executor(self._pool, call)
+
+    async def get_embeddings(self, text):
+        try:
+            response_body = await self.invoke_model(EMBEDDING_V1, json.dumps({"inputText": text}))
+            return response_body.get("embedding")
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise
+
+    async def generate_response(self, prompt, system_prompt="You are a helpful assistant for refugees.", history=None):
+        logger.info(f"Generating response with {NOVA_LITE_V1} (history={len(history) if history else 0} turns, async)")
+        try:
+            body = NovaClient._chat_body(prompt, system_prompt, history)
+            text = _chat_text(await self.invoke_model(NOVA_LITE_V1, body))
+            logger.info("Response generation successful")
+            return text
+        except Exception as e:
+            logger.error(f"Error during response generation: {e}")
+            raise
+
+    async def generate_response_stream(self, prompt, system_prompt="You are a helpful assistant for refugees.", history=None):
+        """Async generator of Nova Lite text deltas."""
+        logger.info(f"Streaming response with {NOVA_LITE_V1} (history={len(history) if history else 0} turns, async)")
+        body = NovaClient._chat_body(prompt, system_prompt, history)
+        client = await self._client(NOVA_LITE_V1)
+        async with self._slot():
+            if self.backend == "aiobotocore":
+                response = await client.invoke_model_with_response_stream(modelId=NOVA_LITE_V1, body=body)
+                try:
+                    async for event in response["body"]:
+                        chunk = event.get("chunk")
+                        text = _stream_delta(chunk.get("bytes")) if chunk else None
+                        if text:
+                            yield text
+                finally:
+                    response["body"].close()
+                return
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._pool,
+                lambda: client.invoke_model_with_response_stream(modelId=NOVA_LITE_V1, body=body),
+            )
+            # Close the EventStream even if the consumer stops early (client
+            # disconnect, deadline), so its pooled connection is released
+            try:
+                events = iter(response["body"])
+                while True:
+                    event = await loop.run_in_executor(self._pool, next, events, None)
+                    if event is None:
+                        break
+                    chunk = event.get("chunk")
+                    text = _stream_delta(chunk.get("bytes")) if chunk else None
+                    if text:
+                        yield text
+            finally:
+                response["body"].close()
+
+    async def aclose(self):
+        ctxs, self._aio_ctxs, self._aio_clients = self._aio_ctxs, {}, {}
+        for ctx in ctxs.values():
+            await ctx.__aexit__(None, None, None)
+        self._loop = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
 # ── Lazy singleton: NOT created at import time ───────────────────────────────
 # This is critical for cloud deployments where env vars are injected AFTER
 # the Python process starts but BEFORE the first request is served.
@@ -103,6 +400,7 @@ _nova_client = None
 
 
 def get_nova_client() -> NovaClient:
+    """Process-wide NovaClient; its Bedrock clients come from the shared registry."""
     global _nova_client
     if _nova_client is None:
         _nova_client = NovaClient()
@@ -0,0 +1,113 @@
+"""
+On-demand profiling of the running server (POST /api/admin/profile).
+
+- cpu:    cProfile of the event-loop thread, so request handling, prompt
+          assembly and everything awaited on the loop; sorted by cumulative time
+- sample: wall-clock stack sampling of every thread via sys._current_frames,
+          which also covers thread-pool work such as VectorStore scoring;
+          returned as collapsed stacks ("outer;inner;leaf count")
+- memory: tracemalloc snapshots at the start and end of the window,
+          reporting the lines whose allocations grew the most
+
+Each profile runs for `seconds` while the server keeps serving, and
+returns plain text. Only one may run at a time.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MODES = ("cpu", "sample", "memory")
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+_running = asyncio.Lock()
+
+
+async def profile_cpu(seconds: float, limit: int = 50) -> str:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+async def sample_stacks(seconds: float, interval: float = 0.005, limit: int = 50) -> str:
+    stacks: Counter = Counter()
+    stop = threading.Event()
+    sampler_id = []
+
+    def run():
+        sampler_id.append(threading.get_ident())
+        while not stop.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != sampler_id[0]:
+                    stacks[_collapse(frame)] += 1
+
+    # A separate thread, so loop-thread stacks are sampled while the loop is busy
+    sampler = threading.Thread(target=run, name="stack-sampler", daemon=True)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stop.set()
+        await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+    total = sum(stacks.values())
+    lines = [f"# {total} samples every {interval * 1000:.0f}ms over {seconds}s"]
+    lines += [f"{stack} {count}" for stack, count in stacks.most_common(limit)]
+    return "\n".join(lines) + "\n"
+
+
+async def trace_memory(seconds: float, limit: int = 50) -> str:
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(25)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    lines = [f"# traced: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB; top growth over {seconds}s"]
+    lines += [str(stat) for stat in after.compare_to(before, "lineno")[:limit]]
+    return "\n".join(lines) + "\n"
+
+
+async def run_profile(mode: str, seconds: float, limit: int = 50) -> str:
+    """Run one profile; raises ProfilerBusy if another is in progress, ValueError on an unknown mode."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}; expected one of {MODES}")
+    if _running.locked():
+        raise ProfilerBusy
+    async with _running:
+        started = time.monotonic()
+        if mode == "cpu":
+            report = await profile_cpu(seconds, limit)
+        elif mode == "sample":
+            report = await sample_stacks(seconds, limit=limit)
+        else:
+            report = await trace_memory(seconds, limit)
+        return f"# {mode} profile, {time.monotonic() - started:.1f}s\n{report}"
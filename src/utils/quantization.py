@@ -0,0 +1,168 @@
+"""
+Compressed in-memory embedding codes for a cheap first-pass scan.
+
+- int8:   per-row symmetric scalar quantisation (4x smaller than float32)
+- binary: sign bits packed 8 per byte, scored by Hamming distance (32x smaller)
+
+Both only pick candidates; VectorStore re-ranks them exactly against the
+float32 rows, which stay in the mmap'd index file and are paged in only
+for the candidates that are actually touched.
+
+Codes are built once when an index generation is published (save_codes)
+and memory-mapped by every worker (load_codes), so their pages are
+shared like the index itself.
+"""
+import logging
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from src.utils.topk import top_k_desc
+
+logger = logging.getLogger(__name__)
+
+# Rows converted to float32 at a time, so a scan never materialises the full matrix
+_BLOCK = 1024
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(a):
+        return _POPCOUNT_TABLE[a]
+
+
+class Int8Codes:
+    kind = "int8"
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray) -> "Int8Codes":
+        scales = np.abs(embeddings).max(axis=1).astype(np.float32) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.empty(embeddings.shape, dtype=np.int8)
+        for start in range(0, len(embeddings), _BLOCK):
+            block = embeddings[start:start + _BLOCK] / scales[start:start + _BLOCK, None]
+            codes[start:start + _BLOCK] = np.rint(block)
+        return cls(codes, scales)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    def scores(self, query: np.ndarray, ids: np.ndarray | None = None) -> np.ndarray:
+        codes = self.codes if ids is None else self.codes[ids]
+        scales = self.scales if ids is None else self.scales[ids]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK):
+            out[start:start + _BLOCK] = codes[start:start + _BLOCK].astype(np.float32) @ query
+        return out * scales
+
+
+class BinaryCodes:
+    kind = "binary"
+
+    def __init__(self, codes: np.ndarray, dim: int):
+        self.codes = codes
+        self.dim = dim
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray) -> "BinaryCodes":
+        return cls(np.packbits(embeddings > 0, axis=1), embeddings.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def scores(self, query: np.ndarray, ids: np.ndarray | None = None) -> np.ndarray:
+        """Higher is closer: dim minus the Hamming distance to the query's sign bits."""
+        codes = self.codes if ids is None else self.codes[ids]
+        q_bits = np.packbits(query > 0)
+        out = np.empty(len(codes), dtype=np.int32)
+        for start in range(0, len(codes), _BLOCK):
+            xor = np.bitwise_xor(codes[start:start + _BLOCK], q_bits)
+            out[start:start + _BLOCK] = _popcount(xor).sum(axis=1, dtype=np.int32)
+        return self.dim - out
+
+
+QUANTIZERS = {"int8": Int8Codes, "binary": BinaryCodes}
+
+
+def quantize(embeddings: np.ndarray, kind: str):
+    """Build codes of the given kind ("int8" or "binary")."""
+    try:
+        return QUANTIZERS[kind].build(embeddings)
+    except KeyError:
+        raise ValueError(f"Unknown quantization {kind!r}; expected one of {sorted(QUANTIZERS)}") from None
+
+
+# ── Persistence ──────────────────────────────────────────────────────────────
+# header (kind, rows, code columns, dim, section offsets, corpus fingerprint),
+# then the int8 row scales (if any) and the code matrix, each 64-byte aligned
+_MAGIC = b"RLNQNT\x00\x01"
+_HEADER = struct.Struct("<8s8sQQQQQ64s")
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def save_codes(path: str, codes, fingerprint: str) -> None:
+    """Write `codes` for the corpus identified by `fingerprint` to `path` (atomic rename)."""
+    matrix = np.ascontiguousarray(codes.codes)
+    scales = np.ascontiguousarray(codes.scales, dtype="<f4") if codes.kind == "int8" else np.empty(0, "<f4")
+    dim = codes.dim if codes.kind == "binary" else matrix.shape[1]
+    scales_off = _aligned(_HEADER.size)
+    codes_off = _aligned(scales_off + scales.nbytes)
+    header = _HEADER.pack(_MAGIC, codes.kind.encode("ascii"), matrix.shape[0], matrix.shape[1], dim,
+                          scales_off, codes_off, fingerprint.encode("ascii"))
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\x00" * (scales_off - _HEADER.size))
+        f.write(scales.tobytes())
+        f.write(b"\x00" * (codes_off - scales_off - scales.nbytes))
+        f.write(matrix.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_codes(path: str, kind: str, expected_fingerprint: str):
+    """Memory-map codes written by save_codes, or None if missing, of another kind or for another corpus."""
+    if kind not in QUANTIZERS or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError("file too small")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, raw_kind, rows, cols, dim, scales_off, codes_off, raw_fp = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC:
+            raise ValueError("bad magic")
+        if raw_kind.rstrip(b"\x00").decode("ascii") != kind:
+            return None
+        if raw_fp.rstrip(b"\x00").decode("ascii") != expected_fingerprint:
+            return None
+        if codes_off + rows * cols > size:
+            raise ValueError("truncated")
+        dtype = np.int8 if kind == "int8" else np.uint8
+        matrix = np.frombuffer(mm, dtype=dtype, count=rows * cols, offset=codes_off).reshape(rows, cols)
+        if kind == "int8":
+            return Int8Codes(matrix, np.frombuffer(mm, dtype="<f4", count=rows, offset=scales_off))
+        return BinaryCodes(matrix, dim)
+    except Exception as e:
+        logger.warning(f"Quantised codes load failed ({path}): {e}")
+        return None
+
+
+def candidates(codes, query: np.ndarray, n: int, ids: np.ndarray | None = None) -> np.ndarray:
+    """Row ids of the n best rows by approximate (quantised) score."""
+    best = top_k_desc(codes.scores(query, ids), n)
+    return best if ids is None else ids[best]
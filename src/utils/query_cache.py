@@ -0,0 +1,149 @@
+"""
+Bounded LRU + TTL cache for query embeddings.
+
+Refugee users ask the same handful of questions over and over, so the
+Titan embedding for a normalised query is kept in memory and, optionally,
+persisted to an .npz file so a restarted process starts warm.
+Thread-safe: lookups happen inside executor threads.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_EDGE_PUNCT = " \t\n?!.,;:¿¡'\"“”«»"
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold, collapse whitespace and drop surrounding punctuation."""
+    return _WS_RE.sub(" ", text.casefold()).strip(_EDGE_PUNCT)
+
+
+class EmbeddingCache:
+    def __init__(self, max_size: int = 1024, ttl: float | None = 86400.0,
+                 path: str | None = None, model_id: str = ""):
+        self.max_size = max_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.path = path
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalize_query(text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                del self._entries[key]
+                self.evictions += 1
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text: str, embedding) -> None:
+        if self.max_size <= 0:
+            return
+        key = normalize_query(text)
+        vec = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = (time.time(), vec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def get_or_compute(self, text: str, compute) -> np.ndarray:
+        """Return the cached embedding for `text`, calling `compute(text)` on a miss."""
+        cached = self.get(text)
+        if cached is not None:
+            return cached
+        embedding = compute(text)
+        self.put(text, embedding)
+        return np.asarray(embedding, dtype=np.float32)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "persistent": bool(self.path),
+        }
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+    def load(self) -> int:
+        """Load persisted entries (skipping expired ones). Returns entries loaded."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_id"]) != self.model_id:
+                    logger.info(f"Query cache {self.path} built for another model; ignoring")
+                    return 0
+                keys, stamps, vectors = data["keys"], data["stored_at"], data["vectors"]
+        except Exception as e:
+            logger.warning(f"Query cache load failed: {e}")
+            return 0
+
+        now = time.time()
+        with self._lock:
+            for key, stored_at, vec in zip(keys.tolist(), stamps.tolist(), vectors):
+                if not self._expired(stored_at, now):
+                    self._entries[key] = (stored_at, vec)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            loaded = len(self._entries)
+            self._dirty = False
+        logger.info(f"Loaded {loaded} cached query embeddings from {self.path}")
+        return loaded
+
+    def save(self) -> bool:
+        """Persist the cache if a path is configured and anything changed."""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            items = list(self._entries.items())
+            self._dirty = False
+        if not items:
+            keys, stamps, vectors = np.array([], dtype=str), np.array([]), np.empty((0, 0), np.float32)
+        else:
+            keys = np.array([k for k, _ in items])
+            stamps = np.array([t for _, (t, _) in items])
+            vectors = np.stack([v for _, (_, v) in items])
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.{os.getpid()}.npz"
+        np.savez(tmp_path, model_id=np.array(self.model_id), keys=keys, stored_at=stamps, vectors=vectors)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved {len(items)} query embeddings to {self.path}")
+        return True
@@ -0,0 +1,43 @@
+"""
+Per-host request rate limiting for outbound scraping.
+
+Each host gets a token bucket refilled at `rate` requests per second with
+room for `burst`. `wait(url)` reserves the next slot under a thread lock
+and sleeps until it comes up, so callers on any thread or event loop
+share one budget per host and are served in arrival order.
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    def __init__(self, rate: float = 2.0, burst: int = 4):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.waited = 0.0
+        self._next_free: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, host: str) -> float:
+        """Seconds until this caller's slot for `host`."""
+        if self.rate <= 0:
+            return 0.0
+        interval = 1.0 / self.rate
+        now = time.monotonic()
+        with self._lock:
+            # A bucket that has been idle holds at most `burst` tokens
+            start = max(self._next_free.get(host, now), now - (self.burst - 1) * interval)
+            self._next_free[host] = start + interval
+            delay = max(0.0, start - now)
+            self.waited += delay
+        return delay
+
+    async def wait(self, url: str) -> None:
+        delay = self._reserve(urlsplit(url).netloc)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {"rate": self.rate, "burst": self.burst, "waited_s": round(self.waited, 3)}
@@ -0,0 +1,196 @@
+"""
+Server-side chat sessions with a token budget.
+
+Clients send a session id instead of replaying the whole conversation on
+every turn. Each session keeps its most recent turns verbatim; once they
+exceed `max_tokens`, the oldest exchanges are folded into a short running
+summary (extractive, so compaction never costs a model call). Request
+bodies and the prompt Nova sees therefore stay bounded however long the
+conversation runs.
+
+Stored in SQLite: a file shared by all workers when `path` is set,
+otherwise an in-process database. A session gets its row on its first
+recorded turn, so requests that never answer cost nothing; at most
+`max_sessions` rows are kept, least recently used dropped first.
+Thread-safe.
+"""
+import json
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+# Nova/Titan tokenizers average roughly four characters per token for English
+CHARS_PER_TOKEN = 4
+# Characters of each compacted turn kept in the running summary
+SUMMARY_LINE_CHARS = 200
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _turns_tokens(turns: list[dict]) -> int:
+    return sum(estimate_tokens(t["content"]) for t in turns)
+
+
+def _summary_line(turn: dict) -> str:
+    text = " ".join(turn["content"].split())
+    text = _SENTENCE_END.split(text, 1)[0]
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    speaker = "User" if turn["role"] == "user" else "Assistant"
+    return f"{speaker}: {text}"
+
+
+def clean_history(history) -> list[dict]:
+    """Valid {"role", "content"} turns only, starting with a user turn as Nova requires."""
+    turns = [
+        {"role": t.get("role"), "content": t.get("content")}
+        for t in history or []
+        if isinstance(t, dict) and t.get("role") in ("user", "assistant") and t.get("content")
+    ]
+    while turns and turns[0]["role"] != "user":
+        turns.pop(0)
+    return turns
+
+
+def compact(summary: str, turns: list[dict], max_tokens: int, summary_tokens: int) -> tuple[str, list[dict]]:
+    """
+    Fold the oldest exchanges into `summary` until the verbatim turns fit in
+    `max_tokens`; the latest exchange is always kept (truncated if it alone
+    is over budget). The summary keeps its newest lines within `summary_tokens`.
+    """
+    turns = [dict(t) for t in turns]
+    lines = summary.splitlines() if summary else []
+    while _turns_tokens(turns) > max_tokens and len(turns) > 2:
+        # Drop a whole user/assistant exchange so the turns still start with the user
+        lines.append(_summary_line(turns.pop(0)))
+        while turns and turns[0]["role"] != "user":
+            lines.append(_summary_line(turns.pop(0)))
+    if _turns_tokens(turns) > max_tokens:
+        limit = max_tokens * CHARS_PER_TOKEN // len(turns)
+        for turn in turns:
+            turn["content"] = turn["content"][:limit]
+    while lines and estimate_tokens("\n".join(lines)) > summary_tokens:
+        lines.pop(0)
+    return "\n".join(lines), turns
+
+
+@dataclass
+class Session:
+    id: str | None  # None for client-sent history, which is not stored
+    summary: str = ""
+    turns: list[dict] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.turns and not self.summary
+
+
+class SessionStore:
+    def __init__(self, path: str | None = None, max_tokens: int = 2000, summary_tokens: int = 400,
+                 ttl: float | None = 86400.0, max_sessions: int = 10000):
+        self.path = path
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.max_sessions = max_sessions
+        self.created = 0
+        self.evicted = 0
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None, timeout=10)
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, summary TEXT NOT NULL, turns TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _expired(self, updated_at: float, now: float) -> bool:
+        return self.ttl is not None and now - updated_at > self.ttl
+
+    def create(self) -> Session:
+        """A new session with a fresh id; it is stored by its first append()."""
+        return Session(secrets.token_urlsafe(16))
+
+    def _make_room(self, now: float) -> None:
+        """Drop expired rows, then the least recently used ones beyond max_sessions - 1."""
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+        (size,) = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        excess = size - self.max_sessions + 1
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated_at LIMIT ?)",
+                (excess,),
+            )
+            self.evicted += excess
+
+    def get(self, session_id: str) -> Session | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary, turns, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or self._expired(row[2], time.time()):
+            return None
+        return Session(session_id, row[0], json.loads(row[1]))
+
+    def get_or_create(self, session_id: str | None) -> Session:
+        """The live session for `session_id`, or a new (not yet stored) one if it is missing or expired."""
+        session = self.get(session_id) if session_id else None
+        return session if session is not None else self.create()
+
+    def append(self, session_id: str, user_text: str, assistant_text: str) -> None:
+        """Record one exchange, compacting older turns if the session is over budget."""
+        with self._lock:
+            # IMMEDIATE: concurrent turns from other workers serialise on the write lock
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT summary, turns FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                now = time.time()
+                if row is None:
+                    self._make_room(now)
+                    self.created += 1
+                summary, turns = (row[0], json.loads(row[1])) if row else ("", [])
+                turns += [{"role": "user", "content": user_text}, {"role": "assistant", "content": assistant_text}]
+                if _turns_tokens(turns) > self.max_tokens:
+                    summary, turns = compact(summary, turns, self.max_tokens, self.summary_tokens)
+                    self.compactions += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (id, summary, turns, updated_at) VALUES (?, ?, ?, ?)",
+                    (session_id, summary, json.dumps(turns, ensure_ascii=False), now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {
+            "sessions": size,
+            "created": self.created,
+            "evicted": self.evicted,
+            "max_sessions": self.max_sessions,
+            "compactions": self.compactions,
+            "max_tokens": self.max_tokens,
+            "backend": "sqlite" if self.path else "memory",
+        }
@@ -0,0 +1,71 @@
+"""
+Coordination for several worker processes sharing one on-disk index.
+
+The embedding index is a read-only mmap, so every uvicorn worker that
+opens the same file shares its pages through the OS page cache. This
+module covers the rest:
+
+- build_lock(): an exclusive file lock so only one worker embeds or
+  migrates the corpus while the others wait and then attach
+- a generation counter file, bumped after each publish, which workers
+  poll to re-attach to a newly written index
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single process, locking not needed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Locks held by the current thread, so nested build_lock() calls do not deadlock
+_held = threading.local()
+
+
+@contextmanager
+def build_lock(path: str):
+    """
+    Hold an exclusive inter-process lock on `path` for the duration of the block.
+    Re-entrant within a thread; other threads and processes wait.
+    """
+    held = _held.__dict__.setdefault("paths", set())
+    if fcntl is None or path in held:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info(f"Index build in progress in another worker; waiting on {path}")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_generation(path: str) -> int:
+    """Current published generation (0 if nothing has been published)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def publish_generation(path: str) -> int:
+    """Bump and atomically write the generation counter. Call with build_lock held."""
+    generation = read_generation(path) + 1
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+    return generation
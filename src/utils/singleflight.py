@@ -0,0 +1,107 @@
+"""
+Request coalescing ("single-flight").
+
+While a call for a key is in flight, further callers with the same key
+wait for it and share its result (or exception) instead of issuing their
+own upstream request. Nothing is cached once the call finishes.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalescing for blocking calls made from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+class _AsyncCall:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Coalescing for coroutines on one event loop. The shared call outlives
+    any one caller, but is cancelled once the last caller waiting for it
+    gives up (disconnect, deadline), since nobody would read its result.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+        self.calls = 0
+        self.shared = 0
+        self.cancelled = 0
+
+    async def do(self, key, factory):
+        """Await `factory()` once per key; concurrent callers share the result."""
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(factory()))
+            self.calls += 1
+
+            def _forget(done, key=key, call=call):
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.future.add_done_callback(_forget)
+        else:
+            self.shared += 1
+        call.waiters += 1
+        try:
+            # shield: one caller leaving must not cancel the call for the others
+            return await asyncio.shield(call.future)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.future.done():
+                if self._calls.get(key) is call:
+                    del self._calls[key]  # later callers start a fresh call
+                call.future.cancel()
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "cancelled": self.cancelled,
+                "in_flight": len(self._calls)}
@@ -0,0 +1,116 @@
+"""
+Per-receipt cache of USCIS case statuses.
+
+Statuses change a few times a month at most, so a portal result is served
+from memory for `ttl` seconds, and after that for up to `max_stale`
+seconds while it is revalidated in the background (stale-while-revalidate).
+Every cached receipt also carries a jittered next-refresh time; a
+background refresher re-checks due receipts so repeat checks stay
+instant, but only for receipts someone asked about within `max_stale`.
+
+Only real portal results may be stored; callers must not put the
+fallback texts produced when the portal or browser fails. Thread-safe.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class _Entry:
+    __slots__ = ("status", "fetched_at", "accessed_at", "refresh_at")
+
+    def __init__(self, status: str, fetched_at: float, refresh_at: float):
+        self.status = status
+        self.fetched_at = fetched_at
+        self.accessed_at = fetched_at
+        self.refresh_at = refresh_at
+
+
+class StatusCache:
+    def __init__(self, ttl: float = 6 * 3600, max_stale: float = 7 * 86400, refresh_interval: float | None = None,
+                 jitter: float = 0.2, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_stale = max(max_stale, ttl)
+        self.refresh_interval = refresh_interval or ttl
+        self.jitter = jitter
+        self.max_size = max_size
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _next_refresh(self, now: float) -> float:
+        return now + self.refresh_interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def get(self, receipt: str) -> tuple[str, str] | None:
+        """(status, FRESH or STALE) for a cached receipt, or None if missing or too old."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(receipt)
+            if entry is None or now - entry.fetched_at > self.max_stale:
+                if entry is not None:
+                    del self._entries[receipt]
+                self.misses += 1
+                return None
+            entry.accessed_at = now
+            self._entries.move_to_end(receipt)
+            if now - entry.fetched_at <= self.ttl:
+                self.hits += 1
+                return entry.status, FRESH
+            self.stale_hits += 1
+            return entry.status, STALE
+
+    def put(self, receipt: str, status: str) -> None:
+        """Store a status read from the portal (never a fallback text)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(receipt)
+            if entry is None:
+                self._entries[receipt] = _Entry(status, now, self._next_refresh(now))
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                entry.status = status
+                entry.fetched_at = now
+                entry.refresh_at = self._next_refresh(now)
+                self._entries.move_to_end(receipt)
+
+    def postpone(self, receipt: str) -> None:
+        """Reschedule a receipt whose refresh failed, keeping its last real status."""
+        with self._lock:
+            entry = self._entries.get(receipt)
+            if entry is not None:
+                entry.refresh_at = self._next_refresh(time.time())
+
+    def due(self, limit: int | None = None) -> list[str]:
+        """Receipts whose refresh time has passed; entries nobody asked about within max_stale are dropped."""
+        now = time.time()
+        with self._lock:
+            idle = [r for r, e in self._entries.items() if now - e.accessed_at > self.max_stale]
+            for receipt in idle:
+                del self._entries[receipt]
+            due = sorted((e.refresh_at, r) for r, e in self._entries.items() if e.refresh_at <= now)
+        receipts = [r for _, r in due]
+        return receipts if limit is None else receipts[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
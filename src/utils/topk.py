@@ -0,0 +1,20 @@
+"""Shared top-k selection used by the retrieval indexes."""
+import numpy as np
+
+
+def top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest scores, highest first.
+    argpartition keeps this O(n); equal scores stay in position order,
+    matching what a stable descending sort would return.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx.sort()
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
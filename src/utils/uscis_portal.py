@@ -0,0 +1,126 @@
+"""
+Browserless USCIS case-status lookup.
+
+Fetches the status page, fills in the receipt form found there (keeping
+its hidden fields, e.g. CSRF tokens), submits it over plain HTTP and
+reads the status line out of the response text with the same patterns
+the Playwright path uses. Costs one GET and one POST instead of a
+Chromium page with network-idle waits.
+
+Raises PortalChanged when the page no longer has the receipt form (a
+redesign, or a form only built by JavaScript) and StatusNotFound when
+the response has no recognisable status line; callers then fall back to
+the browser. Network errors propagate as requests exceptions.
+"""
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+
+STATUS_PATTERNS = (
+    "Case Was", "Application Was", "Request for Evidence",
+    "Notice Was", "Actively Reviewing",
+)
+RECEIPT_FIELD = "appReceiptNum"
+
+
+class PortalChanged(Exception):
+    pass
+
+
+class StatusNotFound(PortalChanged):
+    pass
+
+
+def extract_status(text: str) -> str | None:
+    """First line of `text` that contains one of STATUS_PATTERNS, stripped."""
+    return next(
+        (line.strip() for line in text.split("\n") if any(p in line for p in STATUS_PATTERNS)),
+        None,
+    )
+
+
+class _PageParser(HTMLParser):
+    """Collects the visible text (one line per block) and the forms of a page."""
+
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "form", "title"}
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: list[dict] = []
+        self._text: list[str] = []
+        self._skipping = 0
+        self._form = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self._text.append("\n")
+        if tag == "form":
+            self._form = {"action": attrs.get("action") or "", "method": (attrs.get("method") or "get").lower(),
+                          "fields": {}}
+            self.forms.append(self._form)
+        elif tag == "input" and self._form is not None and attrs.get("name"):
+            if attrs.get("type", "text").lower() not in ("submit", "button", "image", "reset"):
+                self._form["fields"][attrs["name"]] = attrs.get("value") or ""
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._text.append("\n")
+        if tag == "form":
+            self._form = None
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._text.append(data)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+
+def parse_page(html: str) -> _PageParser:
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+# One session per thread: connections are reused, and the GET and POST of a
+# lookup share cookies without mixing them with concurrent lookups
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def fetch_status(portal_url: str, receipt_number: str, timeout: float = 10.0) -> str:
+    """Status line for `receipt_number` read over HTTP. Blocking; run it in a thread."""
+    session = _session()
+    session.cookies.clear()
+    page = session.get(portal_url, timeout=timeout)
+    page.raise_for_status()
+    form = next((f for f in parse_page(page.text).forms if RECEIPT_FIELD in f["fields"]), None)
+    if form is None:
+        raise PortalChanged(f"no form with a {RECEIPT_FIELD} field at {portal_url}")
+    fields = dict(form["fields"], **{RECEIPT_FIELD: receipt_number})
+    action = urljoin(page.url, form["action"])
+    if form["method"] == "post":
+        result = session.post(action, data=fields, timeout=timeout)
+    else:
+        result = session.get(action, params=fields, timeout=timeout)
+    result.raise_for_status()
+    status = extract_status(parse_page(result.text).text)
+    if status is None:
+        raise StatusNotFound("no status line in the portal response")
+    return status
@@ -20,7 +20,9 @@ import uvicorn
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    print(f"[start.py] Starting uvicorn on port {port}")
+    # Workers share one mmap'd embedding index; only one of them builds it
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    print(f"[start.py] Starting uvicorn on port {port} with {workers} worker(s)")
     print(f"[start.py] sys.path = {sys.path[:5]}")
     print(f"[start.py] deps_dir exists: {os.path.isdir(deps_dir)}")
-    uvicorn.run("api_server:app", host="0.0.0.0", port=port, log_level="info")
+    uvicorn.run("api_server:app", host="0.0.0.0", port=port, workers=workers, log_level="info")
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src.utils.admission import (
+    DEGRADE_KEYWORD, DEGRADE_NONE, DEGRADE_RETRIEVAL_ONLY, AdmissionController, Overloaded,
+)
+
+
+def test_free_slot_is_admitted_undegraded():
+    async def run():
+        controller = AdmissionController(max_concurrent=2, max_queue=2)
+        async with controller.admit() as ticket:
+            assert ticket.level == DEGRADE_NONE
+            assert controller.active == 1
+        assert controller.active == 0
+        return controller.stats()
+
+    stats = asyncio.run(run())
+    assert stats["admitted"] == 1 and stats["rejected"] == 0
+
+
+def test_full_queue_is_rejected():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, retry_after=7)
+        holder = await controller.enter()
+        waiter = asyncio.create_task(controller.enter())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.enter()
+        controller.leave()
+        await waiter
+        controller.leave()
+        return holder, excinfo.value, controller.stats()
+
+    _, error, stats = asyncio.run(run())
+    assert error.reason == "queue full" and error.retry_after == 7
+    assert stats["rejected"] == 1 and stats["admitted"] == 2
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+def test_queue_wait_times_out():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        await controller.enter()
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.enter()
+        controller.leave()
+        return excinfo.value, controller.stats()
+
+    error, stats = asyncio.run(run())
+    assert error.reason == "queue timeout"
+    assert stats["timed_out"] == 1 and stats["waiting"] == 0
+
+
+def test_degradation_follows_queue_pressure():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=5,
+                                         keyword_at=0.5, retrieval_only_at=0.8)
+        levels = []
+
+        async def request():
+            async with controller.admit() as ticket:
+                levels.append(ticket.level)
+                await asyncio.sleep(0)
+
+        await controller.enter()
+        waiters = [asyncio.create_task(request()) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert controller.pressure() == pytest.approx(1.0)
+        controller.leave()
+        await asyncio.gather(*waiters)
+        return levels, controller.stats()
+
+    levels, stats = asyncio.run(run())
+    # Each request is degraded by the backlog still queued when it is admitted (4, 3, 2, 1, 0 of 5)
+    assert levels == [DEGRADE_RETRIEVAL_ONLY, DEGRADE_KEYWORD, DEGRADE_NONE, DEGRADE_NONE, DEGRADE_NONE]
+    assert stats["degraded"] == 2
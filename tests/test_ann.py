@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.utils.ann import IVFIndex, fingerprint
+
+
+def _matrix(n=2000, dim=16):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((n, dim)).astype(np.float32)
+    return mat / np.linalg.norm(mat, axis=1, keepdims=True)
+
+
+def test_saved_index_is_reused_for_the_same_matrix(tmp_path):
+    path = str(tmp_path / "index.ivf.npz")
+    matrix = _matrix()
+    IVFIndex.build(matrix, n_lists=16).save(path)
+    loaded = IVFIndex.load(path, fingerprint(matrix.copy()))
+    assert loaded is not None and loaded.n_lists == 16
+
+
+def test_editing_any_single_row_forces_a_rebuild(tmp_path):
+    path = str(tmp_path / "index.ivf.npz")
+    matrix = _matrix()
+    IVFIndex.build(matrix, n_lists=16).save(path)
+    for row in (1, 777, len(matrix) - 2):
+        edited = matrix.copy()
+        edited[row] = -edited[row]
+        assert fingerprint(edited) != fingerprint(matrix)
+        assert IVFIndex.load(path, fingerprint(edited)) is None
+
+
+def test_fingerprint_is_independent_of_batching():
+    matrix = _matrix(n=1000)
+    assert fingerprint(matrix, batch=7) == fingerprint(matrix)
+    assert fingerprint(np.asfortranarray(matrix)) == fingerprint(matrix)
@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.fake_bedrock import FakeBedrock
+from src.utils import nova_integration
+from src.utils.bulk_embedder import BulkEmbedder
+from src.utils.nova_integration import EMBEDDING_V1, NovaClient, get_bedrock_client
+
+
+@pytest.fixture
+def throttling_bedrock(monkeypatch):
+    fake = FakeBedrock(titan_ms=1, jitter=0, throttle_rate=1.0).start()
+    monkeypatch.setenv("AWS_ENDPOINT_URL_BEDROCK_RUNTIME", fake.url)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setenv("AWS_EC2_METADATA_DISABLED", "true")
+    monkeypatch.setattr(nova_integration, "_bedrock_clients", {})
+    monkeypatch.setattr(nova_integration, "_bedrock_session", None)
+    yield fake
+    fake.stop()
+
+
+def test_single_attempt_clients_are_separate_from_the_default(throttling_bedrock):
+    default = get_bedrock_client(EMBEDDING_V1)
+    single = get_bedrock_client(EMBEDDING_V1, max_attempts=1)
+    assert single is not default
+    assert single is get_bedrock_client(EMBEDDING_V1, max_attempts=1)
+    assert single.meta.config.retries["total_max_attempts"] == 1
+    assert default.meta.config.retries["total_max_attempts"] == nova_integration.BEDROCK_MAX_ATTEMPTS
+
+
+def test_bulk_embedding_retries_are_not_stacked(throttling_bedrock):
+    embedder = BulkEmbedder(NovaClient(max_attempts=1).get_embeddings, max_workers=1,
+                            max_retries=2, base_delay=0.001, max_delay=0.001)
+    assert embedder.embed(["a chunk"]) == [None]
+    assert embedder.failed == 1
+    # BulkEmbedder's own attempts only: the first call plus max_retries
+    assert throttling_bedrock.stats()["throttled"] == 3
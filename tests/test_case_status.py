@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+import api_server
+from src.agents.case_tracker_agent import SOURCE_CACHE, SOURCE_FALLBACK, SOURCE_INVALID, SOURCE_PORTAL
+from src.utils.deadline import Deadline
+
+
+class FakeTracker:
+    def __init__(self, status, source):
+        self.result = (status, source)
+
+    async def check_status_async(self, receipt_number, timeout=None):
+        return self.result
+
+
+def _prompt(monkeypatch, status, source, message="What is the status of MSC1234567890?"):
+    monkeypatch.setattr(api_server, "get_case_tracker", lambda: FakeTracker(status, source))
+    req = api_server.ChatRequest(message=message)
+    return asyncio.run(api_server.case_status_stage(req, api_server.DEGRADE_NONE, Deadline(30)))
+
+
+@pytest.mark.parametrize("source", [SOURCE_PORTAL, SOURCE_CACHE])
+def test_portal_status_is_presented_as_uscis_status(monkeypatch, source):
+    prompt = _prompt(monkeypatch, "Case Was Approved", source)
+    assert "from the USCIS portal is: 'Case Was Approved'" in prompt
+
+
+def test_fallback_text_is_not_presented_as_uscis_status(monkeypatch):
+    placeholder = "Your application is currently 'Processing'."
+    prompt = _prompt(monkeypatch, placeholder, SOURCE_FALLBACK)
+    assert placeholder not in prompt
+    assert "could not be reached" in prompt
+    assert "retrieved from the USCIS portal" not in prompt
+
+
+def test_invalid_receipt_asks_for_the_number(monkeypatch):
+    prompt = _prompt(monkeypatch, "Invalid receipt format.", SOURCE_INVALID, "status of ABC1234567890")
+    assert "not a valid USCIS receipt number" in prompt
+    assert "retrieved from the USCIS portal" not in prompt
+
+
+def test_non_status_message_skips_the_lookup(monkeypatch):
+    assert _prompt(monkeypatch, "unused", SOURCE_PORTAL, "How do I apply for asylum?") == ""
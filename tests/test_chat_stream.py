@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+import api_server
+from src.utils.admission import AdmissionController
+
+
+class FakeNova:
+    async def get_embeddings(self, text):
+        return [1.0] + [0.0] * 7
+
+    async def generate_response_stream(self, prompt, system_prompt=None, history=None):
+        yield "answer"
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController(max_concurrent=2, max_queue=2)
+    monkeypatch.setattr(api_server, "chat_admission", controller)
+    monkeypatch.setattr(api_server, "_async_nova_client", FakeNova())
+    return controller
+
+
+def _scope(spec_version):
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+    }
+
+
+def _stream(spec_version, send):
+    body = json.dumps({"message": "How do I apply for asylum?"}).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def run():
+        try:
+            await api_server.app(_scope(spec_version), receive, send)
+        except Exception:
+            pass  # the disconnect surfaces as an error; only the slot matters here
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_disconnect_before_first_chunk_releases_slot(admission, spec_version):
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("client went away")
+
+    _stream(spec_version, send)
+    assert admission.active == 0
+    assert admission.stats()["admitted"] == 1
+
+
+def test_completed_stream_releases_slot_once(admission):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    _stream("2.4", send)
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    assert b"event: done" in body
+    assert admission.active == 0
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.utils.embedding_index import read_index, write_index
+
+MODEL = "amazon.titan-embed-text-v2:0"
+
+
+def _matrix(n, dim=8):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((n, dim)).astype(np.float32)
+    return mat / np.linalg.norm(mat, axis=1, keepdims=True)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "index.bin")
+    chunks = ["asylum interview", "", "período de gracia — 1 año", "x" * 1000]
+    matrix = _matrix(len(chunks))
+    write_index(path, chunks, matrix, MODEL)
+
+    index = read_index(path)
+    assert index.model_id == MODEL
+    assert len(index) == len(chunks) and index.dim == 8
+    assert list(index.chunks) == chunks
+    assert index.chunks[-1] == chunks[-1]
+    assert index.chunks[1:3] == chunks[1:3]
+    np.testing.assert_array_equal(index.embeddings, matrix)
+    assert not os.path.exists(f"{path}.tmp.{os.getpid()}")
+
+
+def test_empty_index(tmp_path):
+    path = str(tmp_path / "index.bin")
+    write_index(path, [], np.empty((0, 0), dtype=np.float32), MODEL)
+    index = read_index(path)
+    assert len(index) == 0 and list(index.chunks) == []
+
+
+def test_shape_mismatch_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_index(str(tmp_path / "index.bin"), ["a", "b"], _matrix(3), MODEL)
+
+
+@pytest.mark.parametrize("keep", [10, 200, -1])
+def test_truncated_file_is_rejected(tmp_path, keep):
+    path = str(tmp_path / "index.bin")
+    write_index(path, ["first chunk", "second chunk"], _matrix(2), MODEL)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:keep])
+    with pytest.raises(ValueError):
+        read_index(path)
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = str(tmp_path / "index.bin")
+    write_index(path, ["chunk"], _matrix(1), MODEL)
+    with open(path, "r+b") as f:
+        f.write(b"NOTANIDX")
+    with pytest.raises(ValueError, match="bad magic"):
+        read_index(path)
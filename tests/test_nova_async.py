@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_bedrock import CANNED_ANSWER, FakeBedrock
+from src.utils import nova_integration
+from src.utils.nova_integration import AsyncNovaClient
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeBedrock(titan_ms=5, nova_ms=5, jitter=0).start()
+    monkeypatch.setenv("AWS_ENDPOINT_URL_BEDROCK_RUNTIME", fake.url)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setenv("AWS_EC2_METADATA_DISABLED", "true")
+    # Fresh boto3 clients for the threads backend, pointed at this fake
+    monkeypatch.setattr(nova_integration, "_bedrock_clients", {})
+    monkeypatch.setattr(nova_integration, "_bedrock_session", None)
+    yield fake
+    fake.stop()
+
+
+async def _calls(client, n=8):
+    texts = [f"question {i}" for i in range(n)]
+    vectors = await asyncio.gather(*(client.get_embeddings(t) for t in texts))
+    answer = await client.generate_response("How do I apply?", history=[])
+    return texts, vectors, answer
+
+
+@pytest.mark.parametrize("backend", ["aiobotocore", "threads"])
+def test_backend_round_trip(fake, backend):
+    client = AsyncNovaClient(max_concurrency=4)
+    assert client.backend == "aiobotocore"  # installed from requirements.txt
+    client.backend = backend
+
+    async def run():
+        try:
+            return await _calls(client)
+        finally:
+            await client.aclose()
+
+    texts, vectors, answer = asyncio.run(run())
+    assert vectors == [FakeBedrock.embedding(t) for t in texts]
+    assert answer == CANNED_ANSWER
+    assert fake.stats()["titan"] == len(texts) and fake.stats()["nova"] == 1
+
+
+def test_concurrent_first_calls_share_one_native_client(fake):
+    client = AsyncNovaClient(max_concurrency=4)
+
+    async def run():
+        try:
+            await _calls(client, n=16)
+            return dict(client._aio_clients)
+        finally:
+            await client.aclose()
+
+    clients = asyncio.run(run())
+    # One client per read-timeout profile (Titan and Nova Lite)
+    assert len(clients) == 2
+    assert client._aio_clients == {} and client._aio_ctxs == {}
+
+
+def test_native_client_is_not_orphaned_across_loops(fake):
+    client = AsyncNovaClient(max_concurrency=4)
+    first = asyncio.new_event_loop()
+    try:
+        first.run_until_complete(client.get_embeddings("first loop"))
+        with pytest.raises(RuntimeError, match="another event loop"):
+            asyncio.run(client.get_embeddings("second loop"))
+        first.run_until_complete(client.aclose())
+    finally:
+        first.close()
+
+    async def run():
+        try:
+            return await client.get_embeddings("second loop")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == FakeBedrock.embedding("second loop")
+
+
+@pytest.mark.parametrize("backend", ["aiobotocore", "threads"])
+def test_saturation_is_reported(fake, backend):
+    fake.titan_ms = 200
+    client = AsyncNovaClient(max_concurrency=1)
+    client.backend = backend
+
+    async def run():
+        try:
+            calls = [asyncio.ensure_future(client.get_embeddings(f"q{i}")) for i in range(3)]
+            await asyncio.sleep(0.1)
+            during = client.stats()
+            await asyncio.gather(*calls)
+            return during, client.stats()
+        finally:
+            await client.aclose()
+
+    during, after = asyncio.run(run())
+    assert (during["in_flight"], during["waiting"]) == (1, 2)
+    assert (after["in_flight"], after["waiting"], after["pool_queue_depth"]) == (0, 0, 0)
+
+
+def test_bedrock_gauges_are_exported(fake, monkeypatch):
+    import api_server
+    from src.utils.metrics import REGISTRY
+
+    monkeypatch.setattr(api_server, "_async_nova_client", AsyncNovaClient(max_concurrency=4))
+    text = REGISTRY.render()
+    for name in ("rln_bedrock_in_flight", "rln_bedrock_waiting", "rln_bedrock_pool_queue_depth"):
+        assert f"\n{name} 0\n" in text
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import api_server
+from src.utils.embedding_index import write_index
+from src.utils.nova_integration import EMBEDDING_V1
+from src.utils.quantization import load_codes, quantize, save_codes
+
+
+def _matrix(n=3000, dim=16):
+    rng = np.random.default_rng(0)
+    mat = rng.standard_normal((n, dim)).astype(np.float32)
+    return mat / np.linalg.norm(mat, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("kind", ["int8", "binary"])
+def test_codes_round_trip_through_mmap(tmp_path, kind):
+    path = str(tmp_path / "index.codes")
+    matrix = _matrix()
+    built = quantize(matrix, kind)
+    save_codes(path, built, "fp")
+
+    loaded = load_codes(path, kind, "fp")
+    assert loaded is not None and not loaded.codes.flags.writeable  # mmap'd, not copied
+    query = matrix[5]
+    np.testing.assert_array_equal(loaded.scores(query), built.scores(query))
+    ids = np.array([3, 99, 2500])
+    np.testing.assert_array_equal(loaded.scores(query, ids), built.scores(query, ids))
+    assert load_codes(path, kind, "other corpus") is None
+    assert load_codes(path, "binary" if kind == "int8" else "int8", "fp") is None
+
+
+@pytest.fixture
+def published(tmp_path, monkeypatch):
+    index_path = str(tmp_path / "embedding_index.bin")
+    for name, suffix in (("INDEX_PATH", ""), ("GENERATION_PATH", ".gen"), ("LOCK_PATH", ".lock"),
+                         ("SOURCES_PATH", ".sources.json"), ("ANN_PATH", ".ivf.npz"), ("QUANT_PATH", ".codes")):
+        monkeypatch.setattr(api_server, name, index_path + suffix)
+    monkeypatch.setattr(api_server, "ANN_MODE", "ivf")
+    monkeypatch.setattr(api_server, "EMBEDDING_QUANT", "int8")
+    matrix = _matrix()
+    write_index(index_path, [f"chunk {i}" for i in range(len(matrix))], matrix, EMBEDDING_V1)
+
+    builds = []
+    publish = api_server.publish_search_indexes
+
+    def counting_publish(embeddings):
+        builds.append(len(embeddings))
+        publish(embeddings)
+
+    monkeypatch.setattr(api_server, "publish_search_indexes", counting_publish)
+    return matrix, builds
+
+
+def test_workers_attach_published_search_indexes_without_building(published):
+    matrix, builds = published
+    api_server.publish_search_indexes(matrix)  # what the publishing worker does under build_lock
+    store = api_server.VectorStore()
+    assert store._attach_index()
+    assert builds == [len(matrix)]
+    assert store.ann is not None and store.codes is not None
+    assert not store.codes.codes.flags.writeable
+    assert store._top_k(matrix[42], 3)[0][1] == 42
+
+
+def test_missing_search_indexes_are_built_once(published):
+    matrix, builds = published
+    stores = [api_server.VectorStore() for _ in range(3)]
+    assert all(store._attach_index() for store in stores)
+    assert builds == [len(matrix)]
+    assert all(store.ann is not None and store.codes is not None for store in stores)
@@ -0,0 +1,65 @@
+import pytest
+
+from src.utils.sessions import SessionStore, compact, estimate_tokens
+
+
+def _exchange(i, size=200):
+    return [
+        {"role": "user", "content": f"Question {i}. " + "q" * size},
+        {"role": "assistant", "content": f"Answer {i}. " + "a" * size},
+    ]
+
+
+def _tokens(turns):
+    return sum(estimate_tokens(t["content"]) for t in turns)
+
+
+def test_within_budget_is_unchanged():
+    turns = _exchange(0, 20)
+    summary, kept = compact("", turns, max_tokens=100, summary_tokens=50)
+    assert summary == "" and kept == turns
+
+
+@pytest.mark.parametrize("max_tokens,summary_tokens", [(120, 40), (300, 100), (110, 1000)])
+def test_compaction_respects_budgets(max_tokens, summary_tokens):
+    turns = [t for i in range(10) for t in _exchange(i)]
+    summary, kept = compact("User: earlier", turns, max_tokens, summary_tokens)
+
+    assert _tokens(kept) <= max_tokens
+    assert estimate_tokens(summary) <= summary_tokens
+    assert kept and kept[0]["role"] == "user"
+    # The latest exchange is always kept verbatim when it fits
+    assert kept[-2:] == turns[-2:]
+    # Folded exchanges end up in the summary, newest last
+    assert summary.splitlines()[-1].startswith("Assistant: Answer")
+    assert len(turns) == 20  # the caller's list is not modified
+
+
+def test_oversized_exchange_is_truncated():
+    turns = _exchange(0, 4000)
+    summary, kept = compact("", turns, max_tokens=100, summary_tokens=50)
+    assert summary == ""
+    assert [t["role"] for t in kept] == ["user", "assistant"]
+    assert _tokens(kept) <= 100
+    assert turns[0]["content"].startswith(kept[0]["content"])
+
+
+def test_store_keeps_sessions_within_budget():
+    store = SessionStore(max_tokens=120, summary_tokens=40)
+    session = store.get_or_create(None)
+    assert store.get(session.id) is None  # stored on its first turn only
+    for i in range(10):
+        store.append(session.id, *(t["content"] for t in _exchange(i)))
+    stored = store.get(session.id)
+    assert _tokens(stored.turns) <= 120
+    assert estimate_tokens(stored.summary) <= 40
+    assert store.stats()["compactions"] > 0
+
+
+def test_store_evicts_least_recently_updated():
+    store = SessionStore(max_sessions=2)
+    ids = [store.get_or_create(None).id for _ in range(3)]
+    for session_id in ids:
+        store.append(session_id, "question", "answer")
+    assert [store.get(i) is not None for i in ids] == [False, True, True]
+    assert store.stats()["evicted"] == 1
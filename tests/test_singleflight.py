@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from src.utils.singleflight import AsyncSingleFlight
+
+
+class Upstream:
+    """A slow call that records whether it finished or was cancelled."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "answer"
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight, upstream = AsyncSingleFlight(), Upstream()
+        results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(5)))
+        return results, upstream, flight.stats()
+
+    results, upstream, stats = asyncio.run(run())
+    assert results == ["answer"] * 5
+    assert upstream.started == 1 and upstream.cancelled == 0
+    assert stats == {"calls": 1, "shared": 4, "cancelled": 0, "in_flight": 0}
+
+
+def test_call_is_cancelled_when_its_only_caller_gives_up():
+    async def run():
+        flight, upstream = AsyncSingleFlight(), Upstream()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("k", upstream), 0.01)
+        await asyncio.sleep(0)
+        return upstream, flight.stats()
+
+    upstream, stats = asyncio.run(run())
+    assert upstream.cancelled == 1
+    assert stats["cancelled"] == 1 and stats["in_flight"] == 0
+
+
+def test_call_survives_while_another_caller_waits():
+    async def run():
+        flight, upstream = AsyncSingleFlight(), Upstream()
+        patient = asyncio.ensure_future(flight.do("k", upstream))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("k", upstream), 0.01)
+        return await patient, upstream, flight.stats()
+
+    result, upstream, stats = asyncio.run(run())
+    assert result == "answer"
+    assert upstream.started == 1 and upstream.cancelled == 0
+    assert stats["cancelled"] == 0
+
+
+def test_caller_after_a_cancelled_call_starts_a_fresh_one():
+    async def run():
+        flight, upstream = AsyncSingleFlight(), Upstream(delay=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("k", upstream), 0.01)
+        # No event-loop turn in between: the cancelled call must not be joined
+        return await flight.do("k", upstream), upstream
+
+    result, upstream = asyncio.run(run())
+    assert result == "answer" and upstream.started == 2
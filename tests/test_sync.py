@@ -0,0 +1,131 @@
+import hashlib
+import threading
+
+import numpy as np
+import pytest
+
+import api_server
+from src.utils.embedding_index import read_index
+
+DIM = 8
+
+
+class FakeNova:
+    """Deterministic stand-in for Titan: one vector per distinct text, calls counted."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def vector(text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 + 0.01 for b in digest[:DIM]]
+
+    def get_embeddings(self, text):
+        with self._lock:
+            self.calls.append(text)
+        return self.vector(text)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    index_path = str(tmp_path / "embedding_index.bin")
+    monkeypatch.setattr(api_server, "INDEX_PATH", index_path)
+    monkeypatch.setattr(api_server, "CHECKPOINT_PATH", index_path + ".ckpt")
+    monkeypatch.setattr(api_server, "GENERATION_PATH", index_path + ".gen")
+    monkeypatch.setattr(api_server, "SOURCES_PATH", index_path + ".sources.json")
+    nova = FakeNova()
+    monkeypatch.setattr(api_server, "get_bulk_nova", lambda: nova)
+    docs = tmp_path / "legal_docs"
+    docs.mkdir()
+    return docs, index_path, nova
+
+
+def _words(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+def _sync(docs):
+    return api_server.VectorStore()._sync_locked(str(docs), chunk_size=4)
+
+
+def _check_rows(index_path):
+    """Every row of the published index holds the normalised embedding of its own chunk."""
+    index = read_index(index_path)
+    for chunk, row in zip(index.chunks, index.embeddings):
+        expected = np.asarray(FakeNova.vector(chunk), dtype=np.float32)
+        np.testing.assert_allclose(row, expected / np.linalg.norm(expected), rtol=1e-6)
+    return index
+
+
+def test_add_modify_remove_reuses_rows(env):
+    docs, index_path, nova = env
+    (docs / "a.txt").write_text(_words("a", 8))  # 2 chunks
+    (docs / "b.txt").write_text(_words("b", 12))  # 3 chunks
+
+    summary = _sync(docs)
+    assert summary["added"] == ["a.txt", "b.txt"]
+    assert summary["chunks_embedded"] == 5 and summary["chunks_reused"] == 0
+    assert summary["generation"] == 1
+    assert len(_check_rows(index_path)) == 5
+
+    # Nothing changed: no Titan calls, nothing published
+    nova.calls.clear()
+    summary = _sync(docs)
+    assert not summary["changed"] and nova.calls == []
+
+    # Appending a chunk to b re-embeds only that chunk; a and b's old chunks keep their rows
+    (docs / "b.txt").write_text(_words("b", 16))
+    summary = _sync(docs)
+    assert summary["modified"] == ["b.txt"] and summary["added"] == []
+    assert summary["chunks_embedded"] == 1 and summary["chunks_reused"] == 5
+    assert nova.calls == ["b12 b13 b14 b15"]
+    assert summary["generation"] == 2
+    assert len(_check_rows(index_path)) == 6
+
+    # Removing a drops its rows without any embedding
+    nova.calls.clear()
+    (docs / "a.txt").unlink()
+    summary = _sync(docs)
+    assert summary["removed"] == ["a.txt"]
+    assert summary["chunks_embedded"] == 0 and summary["chunks_reused"] == 4
+    assert nova.calls == []
+    index = _check_rows(index_path)
+    assert list(index.chunks) == api_server.chunk_document(_words("b", 16), 4)
+
+
+def test_renamed_file_reuses_rows_by_chunk_text(env):
+    docs, index_path, nova = env
+    (docs / "a.txt").write_text(_words("a", 8))
+    _sync(docs)
+
+    nova.calls.clear()
+    (docs / "a.txt").rename(docs / "c.txt")
+    summary = _sync(docs)
+    assert summary["added"] == ["c.txt"] and summary["removed"] == ["a.txt"]
+    assert summary["chunks_embedded"] == 0 and summary["chunks_reused"] == 2
+    assert nova.calls == []
+    _check_rows(index_path)
+
+
+def test_failed_chunks_are_retried_on_next_sync(env, monkeypatch):
+    docs, index_path, nova = env
+    (docs / "a.txt").write_text(_words("a", 8))
+    failing = {"a4 a5 a6 a7"}
+
+    def get_embeddings(text):
+        if text in failing:
+            raise ValueError("validation error")
+        return FakeNova.get_embeddings(nova, text)
+
+    monkeypatch.setattr(nova, "get_embeddings", get_embeddings)
+    summary = _sync(docs)
+    assert summary["chunks_failed"] == 1 and summary["chunks_embedded"] == 1
+
+    failing.clear()
+    nova.calls.clear()
+    summary = _sync(docs)
+    assert summary["modified"] == ["a.txt"]
+    assert nova.calls == ["a4 a5 a6 a7"]
+    assert len(_check_rows(index_path)) == 2
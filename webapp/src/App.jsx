@@ -48,6 +48,7 @@ export default function App() {
   const chatEndRef = useRef(null)
   const animRef = useRef(null)
   const recognitionRef = useRef(null)
+  const sessionRef = useRef(null) // server-side session id; the server keeps the history
 
   // Scroll chat to bottom on new messages
   useEffect(() => {
@@ -86,21 +87,21 @@ export default function App() {
     window.speechSynthesis.speak(utterance)
   }
 
-  // Call Nova API with full conversation history
+  // Call Nova API; conversation history lives in the server-side session
   const callNova = async (text) => {
     const userMsg = { role: 'user', text, ts: Date.now() }
     setConversation(prev => [...prev, userMsg])
     setLoading(true)
 
     try {
-      const history = conversation.map(m => ({ role: m.role === 'user' ? 'user' : 'assistant', content: m.text }))
       const res = await fetch(`${API_BASE}/api/chat`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ message: text, language: lang.split('-')[0], history }),
+        body: JSON.stringify({ message: text, language: lang.split('-')[0], session_id: sessionRef.current }),
       })
       if (!res.ok) throw new Error(`Server error ${res.status}`)
       const data = await res.json()
+      sessionRef.current = data.session_id
       const novaMsg = { role: 'nova', text: data.response, ts: Date.now() }
       setConversation(prev => [...prev, novaMsg])
       // Speak the response
@@ -172,6 +173,10 @@ export default function App() {
     window.speechSynthesis.cancel()
     setSpeaking(false)
     setConversation([])
+    if (sessionRef.current) {
+      fetch(`${API_BASE}/api/chat/sessions/${sessionRef.current}`, { method: 'DELETE' }).catch(() => {})
+      sessionRef.current = null
+    }
     setTranscript('')
   }
 